@@ -0,0 +1,226 @@
+"""
+Results collector for multi-station labs.
+
+Run `python collector.py` on the lab machine to start the collector.
+Each station pushes its completed trial records at the end of sess 2
+(see push_results). Records are written to a local spool first and
+sent in a background thread, so a station never waits on the network.
+Anything that could not be delivered stays in the spool and is resent
+on the next push, or with `python collector.py flush`.
+"""
+import argparse, asyncio, glob, json, math, os, socket, sqlite3, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from trials import FIELDNAMES as TRIAL_FIELDS
+
+HOST = '127.0.0.1'
+PORT = 8765
+DB_FILE = 'nbm_results.sqlite'
+SPOOL_DIR = 'spool'
+FAILED_DIR = 'failed'  # inside the spool; files the collector rejected
+MAX_MESSAGE = 64 * 1024 * 1024  # longest message line the collector accepts (bytes)
+
+
+# ---------------------------------------------------------
+# Store
+# ---------------------------------------------------------
+def open_store(db_file=DB_FILE):
+    """Open (and create if needed) the SQLite store."""
+    conn = sqlite3.connect(db_file, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS sessions ("
+        " participant TEXT NOT NULL, session INTEGER NOT NULL,"
+        " station TEXT, n_trials INTEGER, received_at REAL,"
+        " PRIMARY KEY (participant, session))"
+    )
+    columns = ", ".join(f'"{name}"' for name in TRIAL_FIELDS)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS trials ("
+        " participant TEXT NOT NULL, session INTEGER NOT NULL, "
+        + columns +
+        ", PRIMARY KEY (participant, session, presentation_order))"
+    )
+    conn.execute('CREATE INDEX IF NOT EXISTS trials_type ON trials ("Type")')
+    conn.execute('CREATE INDEX IF NOT EXISTS trials_word ON trials (word)')
+    conn.commit()
+    return conn
+
+
+def store_results(conn, message):
+    """
+    Write one pushed session to the store.
+    A participant/session pair that was already received is replaced,
+    so a station resending its spool never creates duplicates.
+    """
+    participant = str(message['participant'])
+    session = int(message['session'])
+    trials = message['trials']
+    rows = [
+        (participant, session) + tuple(trial.get(name) for name in TRIAL_FIELDS)
+        for trial in trials
+    ]
+    placeholders = ", ".join("?" * (len(TRIAL_FIELDS) + 2))
+    with conn:
+        conn.execute("DELETE FROM trials WHERE participant = ? AND session = ?",
+                     (participant, session))
+        conn.executemany(f"INSERT INTO trials VALUES ({placeholders})", rows)
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+            (participant, session, message.get('station'), len(rows), time.time())
+        )
+    return len(rows)
+
+
+# ---------------------------------------------------------
+# Collector (asyncio server)
+# ---------------------------------------------------------
+async def serve(host=HOST, port=PORT, db_file=DB_FILE):
+    """
+    Accept newline-delimited JSON messages from the stations.
+    Every message is answered with 'ok' once it is committed, or
+    'error' if it could not be stored. A line longer than MAX_MESSAGE is
+    answered with 'error' and the connection is closed. SQLite writes go
+    through a single worker thread so slow disks never stall the other
+    connections.
+    """
+    conn = open_store(db_file)
+    writer_pool = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+
+    async def handle(reader, writer):
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError) as e:
+                    print(f"Rejected message from {peer}: {e}")
+                    writer.write(b"error\n")
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    n = await loop.run_in_executor(writer_pool, store_results, conn, message)
+                    print(f"Stored {n} trials for participant {message['participant']} "
+                          f"(session {message['session']}) from {peer}")
+                    writer.write(b"ok\n")
+                except (ValueError, KeyError, TypeError, sqlite3.Error) as e:
+                    print(f"Rejected message from {peer}: {e}")
+                    writer.write(b"error\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port, limit=MAX_MESSAGE)
+    print(f"Collector listening on {host}:{port}, writing to {db_file}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        writer_pool.shutdown()
+        conn.close()
+
+
+# ---------------------------------------------------------
+# Station side: spool + retry
+# ---------------------------------------------------------
+def _to_json(value):
+    if hasattr(value, 'item'):  # numpy / pandas scalars
+        value = value.item()
+    if value == '' or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def spool_results(trial_list, participant, session, station=None, spool_dir=SPOOL_DIR):
+    """Write a session's records to the spool directory and return the file path."""
+    os.makedirs(spool_dir, exist_ok=True)
+    message = {
+        'participant': str(participant),
+        'session': int(session),
+        'station': station or socket.gethostname(),
+        'trials': [{name: _to_json(trial.get(name)) for name in TRIAL_FIELDS}
+                   for trial in trial_list],
+    }
+    path = os.path.join(spool_dir, f"{participant}_s{session}_{time.time_ns()}.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(message, f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _spool_time(path):
+    """Spool time (ns) from a {participant}_s{session}_{time_ns}.json name."""
+    stamp = os.path.splitext(os.path.basename(path))[0].rsplit('_', 1)[-1]
+    return int(stamp) if stamp.isdigit() else 0
+
+
+def flush_spool(spool_dir=SPOOL_DIR, host=HOST, port=PORT, attempts=3, backoff=1.0, timeout=5.0):
+    """
+    Send every spooled file to the collector, oldest first.
+    Files are deleted only after the collector acknowledges them; a file
+    the collector answers with 'error' is moved to spool/failed/ so it
+    does not hold up the others. If the connection closes before a reply
+    the file stays in the spool and is retried.
+    Returns the number of files still waiting in the spool.
+    """
+    for attempt in range(attempts):
+        pending = sorted(glob.glob(os.path.join(spool_dir, "*.json")), key=_spool_time)
+        if not pending:
+            return 0
+        try:
+            with socket.create_connection((host, port), timeout=timeout) as sock:
+                stream = sock.makefile('rwb')
+                for path in pending:
+                    with open(path, 'rb') as f:
+                        payload = json.dumps(json.load(f)).encode()
+                    stream.write(payload + b"\n")
+                    stream.flush()
+                    reply = stream.readline().strip()
+                    if not reply:
+                        raise ConnectionResetError("connection closed before the reply")
+                    if reply != b"ok":
+                        failed_dir = os.path.join(spool_dir, FAILED_DIR)
+                        os.makedirs(failed_dir, exist_ok=True)
+                        os.replace(path, os.path.join(failed_dir, os.path.basename(path)))
+                        print(f"Collector rejected {path}; moved to {failed_dir}")
+                        continue
+                    os.remove(path)
+        except OSError as e:
+            print(f"Collector unavailable ({e}), attempt {attempt + 1} of {attempts}")
+            time.sleep(backoff * 2 ** attempt)
+    return len(glob.glob(os.path.join(spool_dir, "*.json")))
+
+
+def push_results(trial_list, participant, session, station=None,
+                 spool_dir=SPOOL_DIR, host=HOST, port=PORT):
+    """
+    Spool the records and send them to the collector in the background.
+    Returns the sending thread; join it (with a timeout) before exiting.
+    """
+    spool_results(trial_list, participant, session, station, spool_dir)
+    thread = threading.Thread(target=flush_spool, args=(spool_dir, host, port), daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NBM results collector")
+    parser.add_argument('command', nargs='?', default='serve', choices=['serve', 'flush'])
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--spool', default=SPOOL_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args.host, args.port, args.db))
+        except KeyboardInterrupt:
+            print("Collector stopped")
+    else:
+        left = flush_spool(args.spool, args.host, args.port)
+        print(f"{left} file(s) left in the spool")
@@ -0,0 +1,181 @@
+"""
+Item-level norms from all participants' results.
+
+Every results_<Participant>.csv is indexed once into items.sqlite: its
+responses (indexed by word and excel_order) and its per-word sums,
+reduced with a pandas groupby. The norms table is the sum of those
+per-participant rows, so adding a participant only reads that
+participant's file. A file that changed since it was indexed is
+re-read; one that was removed is dropped.
+
+    python item_norms.py        -> item_norms.csv
+
+Per word: hit rate (as an old word), false-alarm rate (as a new word),
+mean memory and belief ratings, and, for challenged trials, the mean
+belief and memory change (challenge susceptibility). Items are matched
+by word, so participants with different study lists (stimulus_store.py)
+are pooled correctly; excel_order is only reported when all of them
+used the same sheet.
+"""
+import argparse, os, sqlite3
+import numpy as np
+import pandas as pd
+from results_io import participant_files, read_results, RESULTS_PATTERN
+
+DB_FILE = 'items.sqlite'
+OUTPUT_FILE = 'item_norms.csv'
+
+RESPONSE_COLUMNS = ['participant', 'excel_order', 'word', 'Type', 'old_new',
+                    'recognition_response', 'belief_rating', 'memory_rating',
+                    'challenge_belief_rating', 'challenge_memory_rating']
+STAT_COLUMNS = ['n_old', 'n_old_yes', 'n_new', 'n_new_yes',
+                'belief_sum', 'belief_n', 'memory_sum', 'memory_n',
+                'n_challenged', 'belief_change_sum', 'memory_change_sum']
+
+
+def open_store(db_file=DB_FILE):
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE IF NOT EXISTS files (participant TEXT PRIMARY KEY, file_key TEXT)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS responses (participant TEXT, excel_order INTEGER, word TEXT,"
+        ' "Type" TEXT, old_new TEXT, recognition_response TEXT, belief_rating REAL,'
+        " memory_rating REAL, challenge_belief_rating REAL, challenge_memory_rating REAL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS responses_word ON responses (word)")
+    conn.execute("CREATE INDEX IF NOT EXISTS responses_excel_order ON responses (excel_order)")
+    conn.execute("CREATE INDEX IF NOT EXISTS responses_participant ON responses (participant)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS item_stats (participant TEXT, word TEXT, excel_order INTEGER,"
+        ' "Type" TEXT, ' + ", ".join(f"{c} REAL" for c in STAT_COLUMNS) + ")"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS item_stats_participant ON item_stats (participant)")
+    return conn
+
+
+def participant_item_stats(df):
+    """Per-word sums for one participant's results (grouped reductions)."""
+    said_yes = df['recognition_response'].eq('y')
+    is_old = df['old_new'].eq('old')
+    challenged = df['challenge_belief_rating'].notna()
+    parts = pd.DataFrame({
+        'word': df['word'],
+        'excel_order': df['excel_order'],
+        'Type': df['Type'],
+        'n_old': is_old.astype(int),
+        'n_old_yes': (is_old & said_yes).astype(int),
+        'n_new': (~is_old).astype(int),
+        'n_new_yes': (~is_old & said_yes).astype(int),
+        'belief_sum': df['belief_rating'].fillna(0),
+        'belief_n': df['belief_rating'].notna().astype(int),
+        'memory_sum': df['memory_rating'].fillna(0),
+        'memory_n': df['memory_rating'].notna().astype(int),
+        'n_challenged': challenged.astype(int),
+        'belief_change_sum': (df['challenge_belief_rating'] - df['belief_rating']).where(challenged, 0),
+        'memory_change_sum': (df['challenge_memory_rating'] - df['memory_rating']).where(challenged, 0),
+    })
+    return (parts.groupby('word', sort=False)
+            .agg(excel_order=('excel_order', 'first'), Type=('Type', 'first'),
+                 **{c: (c, 'sum') for c in STAT_COLUMNS})
+            .reset_index())
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}_{stat.st_mtime_ns}"
+
+
+def update_index(pattern=RESULTS_PATTERN, db_file=DB_FILE):
+    """Index new or changed result files; drop participants whose file is gone."""
+    conn = open_store(db_file)
+    indexed = dict(conn.execute("SELECT participant, file_key FROM files"))
+    files = participant_files(pattern)
+    added = 0
+    with conn:
+        for participant in set(indexed) - set(files):
+            _drop(conn, participant)
+        for participant, path in files.items():
+            key = _file_key(path)
+            if indexed.get(participant) == key:
+                continue
+            df = read_results(path, participant)
+            _drop(conn, participant)
+            conn.executemany(
+                f"INSERT INTO responses VALUES ({', '.join('?' * len(RESPONSE_COLUMNS))})",
+                _rows(df[RESPONSE_COLUMNS]))
+            stats = participant_item_stats(df)
+            stats.insert(0, 'participant', participant)
+            conn.executemany(
+                f"INSERT INTO item_stats VALUES ({', '.join('?' * len(stats.columns))})",
+                _rows(stats))
+            conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?)", (participant, key))
+            added += 1
+    print(f"{added} participant file(s) indexed, {len(files)} in total")
+    return conn
+
+
+def _drop(conn, participant):
+    for table in ('files', 'responses', 'item_stats'):
+        conn.execute(f"DELETE FROM {table} WHERE participant = ?", (participant,))
+
+
+def _rows(df):
+    """DataFrame rows as plain Python values (NaN -> NULL) for sqlite3."""
+    values = df.astype(object).where(df.notna(), None)
+    return [tuple(v.item() if hasattr(v, 'item') else v for v in row)
+            for row in values.itertuples(index=False, name=None)]
+
+
+def responses_for(conn, word):
+    """All indexed responses to one word."""
+    return pd.read_sql_query("SELECT * FROM responses WHERE word = ?", conn, params=(word,))
+
+
+def same_sheet(conn):
+    """True if every word sits at the same sheet row for all indexed participants."""
+    mismatched = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM (SELECT word FROM item_stats GROUP BY word"
+        "                              HAVING COUNT(DISTINCT excel_order) > 1))"
+        "     + (SELECT COUNT(*) FROM (SELECT excel_order FROM item_stats GROUP BY excel_order"
+        "                              HAVING COUNT(DISTINCT word) > 1))").fetchone()[0]
+    return mismatched == 0
+
+
+def item_norms(conn):
+    """
+    Per-word norms from the per-participant sums. excel_order is only
+    filled in when every participant used the same sheet; otherwise it
+    is NaN and the words are sorted by Type and word.
+    """
+    sums = ", ".join(f"SUM({c}) AS {c}" for c in STAT_COLUMNS)
+    totals = pd.read_sql_query(
+        f'SELECT word, MIN(excel_order) AS excel_order, MIN("Type") AS "Type",'
+        f" COUNT(*) AS n_participants, {sums} FROM item_stats GROUP BY word", conn)
+    if not same_sheet(conn):
+        print("Participants used different stimulus sheets; excel_order left empty")
+        totals['excel_order'] = np.nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        norms = totals[['word', 'excel_order', 'Type', 'n_participants']].assign(
+            hit_rate=totals['n_old_yes'] / totals['n_old'],
+            false_alarm_rate=totals['n_new_yes'] / totals['n_new'],
+            mean_memory=totals['memory_sum'] / totals['memory_n'],
+            mean_belief=totals['belief_sum'] / totals['belief_n'],
+            n_challenged=totals['n_challenged'],
+            mean_belief_change=totals['belief_change_sum'] / totals['n_challenged'],
+            mean_memory_change=totals['memory_change_sum'] / totals['n_challenged'],
+        )
+    return (norms.replace([np.inf, -np.inf], np.nan)
+            .sort_values(['excel_order', 'Type', 'word'], ignore_index=True))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Item-level norms")
+    parser.add_argument('--pattern', default=RESULTS_PATTERN)
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--out', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    conn = update_index(args.pattern, args.db)
+    norms = item_norms(conn)
+    conn.close()
+    norms.to_csv(args.out, index=False)
+    print(f"Norms for {len(norms)} words saved to {args.out}")
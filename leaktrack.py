@@ -0,0 +1,103 @@
+"""
+Per-trial memory and GL resource tracking.
+
+With tracking enabled, snapshot() at every trial boundary records the
+traced Python heap (tracemalloc), the number of live stimulus objects
+and the number of live OpenGL textures. report() fits the per-trial
+growth of each measure, flags anything that keeps growing and lists the
+source lines whose allocations grew most between the first and the
+last trial. Tracking slows the trial boundaries down, so it is meant
+for test runs, not for participants.
+"""
+import csv, gc, tracemalloc
+import numpy as np
+
+# growth per trial above which a measure is flagged
+GROWTH_LIMITS = {'heap_kb': 8.0, 'stimuli': 0.5, 'textures': 0.5}
+WARMUP_TRIALS = 3
+MAX_TEXTURE_ID = 4096
+
+
+def live_stimuli():
+    """Live PsychoPy stimulus objects by class name."""
+    from psychopy.visual.basevisual import BaseVisualStim
+    counts = {}
+    for obj in gc.get_objects():
+        if isinstance(obj, BaseVisualStim):
+            name = type(obj).__name__
+            counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def live_textures(max_id=MAX_TEXTURE_ID):
+    """Number of texture names currently allocated in the GL context."""
+    try:
+        from pyglet import gl
+    except ImportError:
+        return -1
+    return sum(1 for i in range(1, max_id) if gl.glIsTexture(i))
+
+
+class LeakTracker:
+
+    def __init__(self, phase, enabled=True):
+        self.phase = phase
+        self.enabled = enabled
+        self.rows = []
+        self._first = None
+        self._last = None
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+
+    def snapshot(self, trial):
+        if not self.enabled:
+            return
+        stimuli = live_stimuli()
+        heap, _ = tracemalloc.get_traced_memory()
+        self.rows.append({
+            'phase': self.phase, 'trial': trial,
+            'heap_kb': heap / 1024.0,
+            'stimuli': sum(stimuli.values()),
+            'textures': live_textures(),
+            'by_class': ' '.join(f"{name}={n}" for name, n in sorted(stimuli.items())),
+        })
+        snap = tracemalloc.take_snapshot()
+        if self._first is None and len(self.rows) > WARMUP_TRIALS:
+            self._first = snap
+        self._last = snap
+
+    def growth(self):
+        """Per-trial slope of each measure after the warm-up trials."""
+        rows = self.rows[WARMUP_TRIALS:]
+        if len(rows) < 3:
+            return {}
+        trials = np.array([r['trial'] for r in rows], dtype=float)
+        slopes = {}
+        for measure in GROWTH_LIMITS:
+            values = np.array([r[measure] for r in rows], dtype=float)
+            if (values < 0).any():  # not available
+                continue
+            slopes[measure] = float(np.polyfit(trials, values, 1)[0])
+        return slopes
+
+    def report(self, filename=None, top=10):
+        if not self.enabled:
+            return {}
+        slopes = self.growth()
+        flagged = {m: s for m, s in slopes.items() if s > GROWTH_LIMITS[m]}
+        print(f"{self.phase}: {len(self.rows)} trial boundaries tracked")
+        for measure, slope in slopes.items():
+            flag = "  <-- GROWING" if measure in flagged else ""
+            print(f"  {measure}: {slope:+.2f} per trial{flag}")
+        if flagged and self._first is not None and self._last is not None:
+            print(f"  largest allocation growth since trial {WARMUP_TRIALS + 1}:")
+            for stat in self._last.compare_to(self._first, 'lineno')[:top]:
+                print(f"    {stat}")
+        if filename:
+            with open(filename, 'w', newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=['phase', 'trial', 'heap_kb',
+                                                             'stimuli', 'textures', 'by_class'])
+                writer.writeheader()
+                writer.writerows(self.rows)
+            print(f"  per-trial counts saved to {filename}")
+        return flagged
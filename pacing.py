@@ -0,0 +1,123 @@
+"""
+Frame pacing and frame-interval statistics.
+
+FramePacer paces a pygame loop and records every frame interval, so a
+station's smoothness can be checked from the histogram it writes.
+summarize_intervals also works on PsychoPy's win.frameIntervals.
+"""
+import csv, time
+import numpy as np
+
+PACING_MODES = ('tick', 'busy', 'hybrid', 'vsync')
+REFRESH_TOLERANCE = 0.03  # relative refresh-rate mismatch still accepted for 'vsync'
+
+
+class FramePacer:
+    """
+    Call wait() once per frame, right after pygame.display.flip().
+      'tick'   - clock.tick(fps): sleeps, coarse (the old behaviour)
+      'busy'   - clock.tick_busy_loop(fps): spins, precise but uses a core
+      'hybrid' - sleeps until spin_ms before the frame is due, then spins
+      'vsync'  - no extra wait, flip() already blocks on the refresh; only
+                 valid on a vsynced display refreshing at fps (see
+                 measure_refresh_rate)
+    """
+
+    def __init__(self, fps, mode='tick', spin_ms=2.0):
+        import pygame
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown pacing mode {mode!r}, expected one of {PACING_MODES}")
+        self.fps = fps
+        self.mode = mode
+        self.period = 1.0 / fps
+        self.spin = spin_ms / 1000.0
+        self.clock = pygame.time.Clock()
+        self.intervals = []
+        self._last = None
+        self._next = None
+
+    def wait(self):
+        if self.mode == 'tick':
+            self.clock.tick(self.fps)
+        elif self.mode == 'busy':
+            self.clock.tick_busy_loop(self.fps)
+        elif self.mode == 'hybrid':
+            now = time.perf_counter()
+            if self._next is None or now - self._next > self.period:
+                self._next = now + self.period  # first frame, or fell behind: resync
+            remaining = self._next - now
+            if remaining > self.spin:
+                time.sleep(remaining - self.spin)
+            while time.perf_counter() < self._next:
+                pass
+            self._next += self.period
+
+        now = time.perf_counter()
+        if self._last is not None:
+            self.intervals.append(now - self._last)
+        self._last = now
+
+    def reset(self):
+        """Forget the last timestamp, e.g. after a pause that is not a frame."""
+        self._last = None
+        self._next = None
+
+
+def measure_refresh_rate(n_frames=30):
+    """Refresh rate (Hz) of the current pygame display from the median of n_frames flips."""
+    import pygame
+    stamps = []
+    for _ in range(n_frames + 1):
+        pygame.display.flip()
+        stamps.append(time.perf_counter())
+    return 1.0 / max(float(np.median(np.diff(stamps))), 1e-6)
+
+
+def refresh_matches(rate, fps, tolerance=REFRESH_TOLERANCE):
+    """True if a display refreshing at rate Hz paces a loop written for fps frames/s."""
+    return abs(rate - fps) <= tolerance * fps
+
+
+def summarize_intervals(intervals, period):
+    """Mean, SD, percentiles and late frames (> 1.5 periods) in ms."""
+    x = np.asarray(intervals, dtype=float) * 1000.0
+    if x.size == 0:
+        return {'n': 0}
+    return {
+        'n': int(x.size),
+        'mean_ms': float(x.mean()),
+        'sd_ms': float(x.std()),
+        'p1_ms': float(np.percentile(x, 1)),
+        'p99_ms': float(np.percentile(x, 99)),
+        'max_ms': float(x.max()),
+        'n_late': int(np.count_nonzero(x > 1500.0 * period)),
+    }
+
+
+def interval_histogram(intervals, bin_ms=0.5):
+    """(bin start in ms, count) pairs for the frame intervals."""
+    x = np.asarray(intervals, dtype=float) * 1000.0
+    if x.size == 0:
+        return []
+    edges = np.arange(np.floor(x.min() / bin_ms) * bin_ms, x.max() + bin_ms, bin_ms)
+    if len(edges) < 2:
+        edges = np.array([edges[0], edges[0] + bin_ms])
+    counts, edges = np.histogram(x, bins=edges)
+    return [(float(start), int(count)) for start, count in zip(edges[:-1], counts)]
+
+
+def save_histogram(intervals, filename, bin_ms=0.5):
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['bin_start_ms', 'count'])
+        writer.writerows(interval_histogram(intervals, bin_ms))
+
+
+def print_summary(label, intervals, period):
+    s = summarize_intervals(intervals, period)
+    if not s['n']:
+        print(f"{label}: no frames recorded")
+        return s
+    print(f"{label}: {s['n']} frames, mean {s['mean_ms']:.2f} ms, SD {s['sd_ms']:.2f} ms, "
+          f"99th pct {s['p99_ms']:.2f} ms, max {s['max_ms']:.2f} ms, {s['n_late']} late")
+    return s
@@ -0,0 +1,31 @@
+"""
+Background preparation of the next phase's data.
+
+A single worker thread loads files and builds trial plans while the
+main thread sits on an instruction screen or runs the filler. Only data
+is prepared here: PsychoPy stimuli must still be created on the main
+thread, which owns the OpenGL context.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prefetcher:
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+        self._jobs = {}
+
+    def start(self, name, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) on the worker under name."""
+        self._jobs[name] = self._pool.submit(fn, *args, **kwargs)
+
+    def has(self, name):
+        return name in self._jobs
+
+    def get(self, name):
+        """Wait for the job started under name and return its result (or raise its error)."""
+        return self._jobs.pop(name).result()
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._jobs.clear()
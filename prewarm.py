@@ -0,0 +1,65 @@
+"""
+Glyph prewarming and late-flip reporting.
+
+The first draw of a word whose characters are not yet in the font atlas
+rasterizes them on the spot, which can push that trial's first flip
+past its frame. prewarm_glyphs draws every character of the word list
+and instruction texts once before the first trial; FlipDeadlineLog
+reports trials whose first flip is still late.
+"""
+from psychopy import visual, core
+
+
+def prewarm_glyphs(win, texts, heights=(36, 40, 48), font='Arial', line_length=40):
+    """
+    Rasterize every character used in texts, at every text height used,
+    into the font atlas. Drawing goes to the back buffer, which is
+    cleared afterwards, so nothing is shown.
+    Returns the number of distinct characters.
+    """
+    chars = sorted(set(''.join(str(t) for t in texts)) - set('\n\r\t '))
+    # a few short lines rather than one long one, so nothing is wrapped away
+    lines = [''.join(chars[i:i + line_length]) for i in range(0, len(chars), line_length)]
+    charset = '\n'.join(lines)
+    if not charset:
+        return 0
+    for height in heights:
+        stim = visual.TextStim(win=win, text=charset, font=font, height=height,
+                               color='white', wrapWidth=None)
+        stim.draw()
+    win.clearBuffer()
+    return len(chars)
+
+
+class FlipDeadlineLog:
+    """
+    Records trials whose first flip missed its deadline.
+    Call start() right before drawing a trial's first screen and check()
+    with the time returned by that win.flip(). A flip counts as late when
+    it comes more than max_frames refresh periods after start().
+    """
+
+    def __init__(self, win, phase, max_frames=2):
+        frame_period = win.monitorFramePeriod or 1.0 / 60.0
+        self.phase = phase
+        self.deadline = max_frames * frame_period
+        self.late = []
+        self._t_start = None
+
+    def start(self):
+        self._t_start = core.getTime()
+
+    def check(self, t_flip, label):
+        delay = t_flip - self._t_start
+        if delay > self.deadline:
+            self.late.append((label, delay))
+        return delay
+
+    def report(self):
+        if not self.late:
+            print(f"{self.phase}: all first flips within {self.deadline * 1000:.1f} ms")
+            return
+        print(f"{self.phase}: {len(self.late)} trial(s) missed the first-flip deadline "
+              f"({self.deadline * 1000:.1f} ms)")
+        for label, delay in self.late:
+            print(f"  {label}: {delay * 1000:.1f} ms")
@@ -0,0 +1,120 @@
+"""
+Real-time mode for the timed presentation sections.
+
+Inside a RealtimeSection the cyclic garbage collector is off (call
+collect() in ISIs instead), the process runs at raised priority via
+core.rush and, optionally, is pinned to one CPU core (psutil, which
+PsychoPy installs, on Windows and Linux; os.sched_setaffinity otherwise;
+macOS has no CPU pinning and only gets a warning). The section also
+records how far each timed flip-to-flip duration overshot its target,
+and appends a summary row to frame_jitter.csv. Running a station once
+with enabled=False and once with enabled=True gives the before/after
+comparison.
+"""
+import csv, gc, os, time
+import numpy as np
+from psychopy import core
+
+JITTER_FILE = 'frame_jitter.csv'
+
+
+def pin_to_cpu(cpu):
+    """
+    Pin this process to one CPU core. Returns a function that restores the
+    previous affinity, or None (with a warning) if pinning is not possible.
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    errors = (OSError, ValueError) + ((psutil.Error,) if psutil else ())
+    try:
+        if psutil is not None and hasattr(psutil.Process, 'cpu_affinity'):
+            proc = psutil.Process()
+            previous = proc.cpu_affinity()
+            proc.cpu_affinity([cpu])
+            return lambda: proc.cpu_affinity(previous)
+        if hasattr(os, 'sched_setaffinity'):
+            previous = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, {cpu})
+            return lambda: os.sched_setaffinity(0, previous)
+        reason = "not supported on this platform"
+    except errors as e:
+        reason = e
+    print(f"WARNING: could not pin the process to CPU {cpu} ({reason})")
+    return None
+
+
+class RealtimeSection:
+
+    def __init__(self, win, label, enabled=True, cpu=None, log_file=JITTER_FILE):
+        self.win = win
+        self.label = label
+        self.enabled = enabled
+        self.cpu = cpu
+        self.log_file = log_file
+        self.errors = []
+        self._gc_was_enabled = gc.isenabled()
+        self._restore_affinity = None
+
+    def __enter__(self):
+        if self.enabled:
+            gc.collect()
+            gc.disable()
+            if not core.rush(True):
+                print(f"{self.label}: could not raise process priority")
+            if self.cpu is not None:
+                self._restore_affinity = pin_to_cpu(self.cpu)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.enabled:
+            if self._restore_affinity is not None:
+                self._restore_affinity()
+                self._restore_affinity = None
+            core.rush(False)
+            if self._gc_was_enabled:
+                gc.enable()
+        self.report()
+        return False
+
+    def collect(self):
+        """Collect garbage during an ISI, where a pause does no harm."""
+        if self.enabled:
+            gc.collect()
+
+    def timed(self, intended, t_start, t_end):
+        """Record a flip-to-flip duration that should have been `intended` seconds."""
+        self.errors.append(t_end - t_start - intended)
+
+    def summary(self):
+        err = np.asarray(self.errors) * 1000.0
+        frame_ms = (self.win.monitorFramePeriod or 1.0 / 60.0) * 1000.0
+        if err.size == 0:
+            return {'n': 0}
+        return {
+            'n': int(err.size),
+            'mean_ms': float(err.mean()),
+            'sd_ms': float(err.std()),
+            'max_ms': float(err.max()),
+            'n_late': int(np.count_nonzero(err > 1.5 * frame_ms)),
+        }
+
+    def report(self):
+        s = self.summary()
+        mode = 'realtime' if self.enabled else 'normal'
+        if not s['n']:
+            return s
+        print(f"{self.label} ({mode}): {s['n']} timed flips, overshoot mean {s['mean_ms']:.2f} ms, "
+              f"SD {s['sd_ms']:.2f} ms, max {s['max_ms']:.2f} ms, {s['n_late']} late by > 1.5 frames")
+        if self.log_file:
+            new_file = not os.path.exists(self.log_file)
+            with open(self.log_file, 'a', newline='') as csvfile:
+                writer = csv.writer(csvfile)
+                if new_file:
+                    writer.writerow(['time', 'section', 'mode', 'n', 'mean_ms', 'sd_ms',
+                                     'max_ms', 'n_late'])
+                writer.writerow([time.strftime('%Y-%m-%d %H:%M:%S'), self.label, mode, s['n'],
+                                 f"{s['mean_ms']:.3f}", f"{s['sd_ms']:.3f}",
+                                 f"{s['max_ms']:.3f}", s['n_late']])
+        return s
@@ -0,0 +1,146 @@
+"""
+Permutation and bootstrap tests for valence effects on belief change.
+
+For challenged trials (see run_challenge_phase) the effects are
+    belief_change = challenge_belief_rating - belief_rating
+    memory_change = challenge_memory_rating - memory_rating
+averaged per participant and valence Type. Participants are the unit of
+analysis: each Type's mean change is tested against 0, and every pair
+of Types is compared within participants, with sign-flip p-values and
+bootstrap CIs over participants. Resamples are drawn as NumPy matrices,
+a chunk at a time so memory stays bounded, and can be spread over
+several processes:
+
+    python resampling.py --n 10000 --processes 4   -> valence_effects.csv
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import numpy as np
+import pandas as pd
+from results_io import load_results, RESULTS_PATTERN
+
+OUTPUT_FILE = 'valence_effects.csv'
+MAX_CHUNK_ELEMENTS = 4_000_000  # about 32 MB of float64 per resample matrix
+CHANGE_MEASURES = {
+    'belief_change': ('challenge_belief_rating', 'belief_rating'),
+    'memory_change': ('challenge_memory_rating', 'memory_rating'),
+}
+
+
+def challenged_trials(df):
+    """Challenged trials with their belief and memory change."""
+    trials = df[df['challenge_belief_rating'].notna()].copy()
+    for measure, (after, before) in CHANGE_MEASURES.items():
+        trials[measure] = trials[after] - trials[before]
+    return trials
+
+
+def participant_means(df, measure):
+    """Mean change per participant (rows) and Type (columns); NaN where a participant has none."""
+    trials = challenged_trials(df)
+    return trials.pivot_table(index='participant', columns='Type', values=measure, aggfunc='mean')
+
+
+# ---------------------------------------------------------
+# Resampling kernel (one chunk of resamples per call)
+# ---------------------------------------------------------
+def _sign_flip_chunk(x, size, rng):
+    """Sign-flip null statistics and bootstrap means for mean(x)."""
+    signs = rng.integers(0, 2, size=(size, len(x)), dtype=np.int8) * 2 - 1
+    null = (signs * x).mean(axis=1)
+    boot = x[rng.integers(0, len(x), size=(size, len(x)))].mean(axis=1)
+    return null, boot
+
+
+def _resample(x, n_resamples, seed):
+    """Run n_resamples in chunks; returns (null statistics, bootstrap statistics)."""
+    rng = np.random.default_rng(seed)
+    chunk = max(1, MAX_CHUNK_ELEMENTS // max(len(x), 1))
+    nulls, boots = [], []
+    for start in range(0, n_resamples, chunk):
+        null, boot = _sign_flip_chunk(x, min(chunk, n_resamples - start), rng)
+        nulls.append(null)
+        boots.append(boot)
+    return np.concatenate(nulls), np.concatenate(boots)
+
+
+def resample_test(x, n_resamples=10000, seed=None, pool=None, n_jobs=1, ci=0.95):
+    """
+    Sign-flip p-value and percentile bootstrap CI for mean(x), where x
+    holds one value per participant (a mean change, or the within-
+    participant difference between two Types). With a process pool the
+    resamples are split into n_jobs independent streams.
+    """
+    x = np.asarray(x, dtype=float)
+    estimate = x.mean()
+
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    seeds = seed.spawn(n_jobs)
+    counts = np.full(n_jobs, n_resamples // n_jobs)
+    counts[:n_resamples % n_jobs] += 1
+    if pool is None:
+        parts = [_resample(x, int(n), s) for n, s in zip(counts, seeds)]
+    else:
+        parts = list(pool.map(_resample, [x] * n_jobs, [int(n) for n in counts], seeds))
+    null = np.concatenate([p[0] for p in parts])
+    boot = np.concatenate([p[1] for p in parts])
+
+    p_value = (np.count_nonzero(np.abs(null) >= abs(estimate) - 1e-12) + 1) / (len(null) + 1)
+    alpha = (1 - ci) / 2
+    ci_low, ci_high = np.quantile(boot, [alpha, 1 - alpha])
+    return estimate, ci_low, ci_high, p_value
+
+
+# ---------------------------------------------------------
+# Contrasts
+# ---------------------------------------------------------
+def valence_contrasts(df, n_resamples=10000, processes=1, seed=None, ci=0.95):
+    """
+    CIs and p-values for the belief and memory change, per Type and for
+    every pair of Types (paired within participants), from the combined
+    results table.
+    """
+    types = sorted(challenged_trials(df)['Type'].dropna().unique())
+    cells = [(t, None) for t in types] + list(combinations(types, 2))
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(CHANGE_MEASURES) * len(cells)))
+    rows = []
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    try:
+        for measure in CHANGE_MEASURES:
+            means = participant_means(df, measure).reindex(columns=types)
+            for first, second in cells:
+                seed_cell = next(seeds)
+                x = means[first] if second is None else means[first] - means[second]
+                x = x.dropna().to_numpy()
+                if len(x) == 0:
+                    continue
+                estimate, ci_low, ci_high, p_value = resample_test(
+                    x, n_resamples, seed_cell, pool, max(processes, 1), ci)
+                rows.append({
+                    'measure': measure,
+                    'contrast': first if second is None else f"{first} - {second}",
+                    'n_participants': len(x),
+                    'estimate': estimate, 'ci_low': ci_low, 'ci_high': ci_high,
+                    'p_value': p_value,
+                })
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Valence effects on belief and memory change")
+    parser.add_argument('--pattern', default=RESULTS_PATTERN)
+    parser.add_argument('--n', type=int, default=10000, help="permutations and bootstrap resamples")
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--out', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    table = valence_contrasts(load_results(args.pattern), args.n, args.processes, args.seed)
+    print(table.to_string(index=False))
+    table.to_csv(args.out, index=False)
+    print(f"Results saved to {args.out}")
@@ -0,0 +1,36 @@
+"""
+Reading the results_<Participant>.csv files written by sess 2.
+"""
+import glob, os, re
+import pandas as pd
+
+RESULTS_PATTERN = "results_*.csv"
+
+
+def participant_files(pattern=RESULTS_PATTERN):
+    """Map participant ID -> results file, for every file matching pattern."""
+    files = {}
+    for path in sorted(glob.glob(pattern)):
+        match = re.match(r"results_(.*)\.csv$", os.path.basename(path))
+        if match:
+            files[match.group(1)] = path
+    return files
+
+
+def read_results(path, participant=None):
+    """One participant's results, with a 'participant' column added."""
+    df = pd.read_csv(path, dtype={'word': str, 'Type': str, 'old_new': str, 'y_n': str,
+                                  'recognition_response': str})
+    if participant is None:
+        participant = re.match(r"results_(.*)\.csv$", os.path.basename(path)).group(1)
+    df.insert(0, 'participant', str(participant))
+    return df
+
+
+def load_results(pattern=RESULTS_PATTERN):
+    """All participants' results combined into one table."""
+    frames = [read_results(path, p) for p, path in participant_files(pattern).items()]
+    if not frames:
+        print(f"No result files match {pattern}")
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
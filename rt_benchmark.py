@@ -0,0 +1,222 @@
+"""
+Loopback RT-accuracy benchmark for the input paths used by the sessions.
+
+A helper thread "presses" a key (or sets the slider) at a scheduled
+time after a stimulus flip, and the response path under test measures
+the RT the way the experiment does. The difference between measured and
+true RT gives each path's bias and jitter on this station.
+
+Input backends:
+  injected - keys go straight into PsychoPy's event buffer and the
+             slider rating is set directly; measures polling/timing
+             overhead only
+  uinput   - keys come from a virtual keyboard (Linux, python-evdev,
+             write access to /dev/uinput); adds the OS and window-system
+             latency. The slider path is not covered by this backend.
+
+Response paths:
+  waitKeys - event.waitKeys with timeStamped clock (recognition)
+  getKeys  - event.getKeys polled once per frame (escape, filler)
+  slider   - slider.getRating polled once per frame (ratings)
+
+    python rt_benchmark.py --backends injected uinput --n 50
+"""
+import argparse, csv, random, threading, time
+import numpy as np
+from psychopy import visual, core, event
+
+OUTPUT_FILE = 'rt_benchmark.csv'
+PATHS = ('waitKeys', 'getKeys', 'slider')
+
+
+# ---------------------------------------------------------
+# Input backends
+# ---------------------------------------------------------
+class InjectedInput:
+    name = 'injected'
+    supports_slider = True
+
+    def press(self, key):
+        event._onPygletKey(key, 0, emulated=True)
+
+    def rate(self, slider, value):
+        slider.recordRating(value)
+
+    def close(self):
+        pass
+
+
+class UinputInput:
+    name = 'uinput'
+    supports_slider = False
+
+    def __init__(self):
+        from evdev import UInput, ecodes
+        self.ecodes = ecodes
+        self.ui = UInput({ecodes.EV_KEY: [ecodes.KEY_Y]}, name='nbm-rt-benchmark')
+        time.sleep(1.0)  # give the window system time to pick up the device
+
+    def press(self, key):
+        code = getattr(self.ecodes, f"KEY_{key.upper()}")
+        self.ui.write(self.ecodes.EV_KEY, code, 1)
+        self.ui.syn()
+        self.ui.write(self.ecodes.EV_KEY, code, 0)
+        self.ui.syn()
+
+    def close(self):
+        self.ui.close()
+
+
+BACKENDS = {'injected': InjectedInput, 'uinput': UinputInput}
+
+
+def _fire_at(t_target, action, result):
+    """Sleep, then spin, until t_target (core.getTime clock); run action and record when."""
+    remaining = t_target - core.getTime()
+    if remaining > 0.002:
+        time.sleep(remaining - 0.002)
+    while core.getTime() < t_target:
+        pass
+    result['t_fired'] = core.getTime()
+    action()
+
+
+def schedule(t_target, action):
+    result = {}
+    thread = threading.Thread(target=_fire_at, args=(t_target, action, result), daemon=True)
+    thread.start()
+    return thread, result
+
+
+# ---------------------------------------------------------
+# Response paths (timed as in sess 1 / sess 2)
+# ---------------------------------------------------------
+def _trial_waitkeys(win, stim, rt_clock, backend, delay):
+    stim.draw()
+    t_flip = win.flip()
+    rt_clock.reset()
+    thread, fired = schedule(t_flip + delay, lambda: backend.press('y'))
+    keys = event.waitKeys(keyList=['y'], timeStamped=rt_clock, maxWait=delay + 2.0)
+    thread.join()
+    measured = keys[0][1] if keys else np.nan
+    return measured, fired['t_fired'] - t_flip
+
+
+def _trial_getkeys(win, stim, rt_clock, backend, delay):
+    stim.draw()
+    t_flip = win.flip()
+    rt_clock.reset()
+    thread, fired = schedule(t_flip + delay, lambda: backend.press('y'))
+    measured = np.nan
+    while rt_clock.getTime() < delay + 2.0:
+        if event.getKeys(keyList=['y']):
+            measured = rt_clock.getTime()
+            break
+        stim.draw()
+        win.flip()
+    thread.join()
+    return measured, fired['t_fired'] - t_flip
+
+
+def _trial_slider(win, slider, rt_clock, backend, delay):
+    slider.reset()
+    slider.draw()
+    t_flip = win.flip()
+    rt_clock.reset()
+    thread, fired = schedule(t_flip + delay, lambda: backend.rate(slider, 5))
+    measured = np.nan
+    while rt_clock.getTime() < delay + 2.0:
+        slider.draw()
+        win.flip()
+        if slider.getRating() is not None:
+            measured = rt_clock.getTime()
+            break
+    thread.join()
+    return measured, fired['t_fired'] - t_flip
+
+
+def run_benchmark(win, backend_names, n_trials=50, min_delay=0.2, max_delay=0.8):
+    """Returns one row per trial: backend, path, true and measured RT (s)."""
+    stim = visual.TextStim(win=win, text="word", font='Arial', height=48, color='white')
+    slider = visual.Slider(win=win, pos=(0, -150), size=(1200, 80),
+                           labels=["1", "2", "3", "4", "5", "6", "7", "8"],
+                           ticks=[1, 2, 3, 4, 5, 6, 7, 8], style='rating',
+                           color='White', font='Arial', labelHeight=20, markerColor='Red')
+    rt_clock = core.Clock()
+    rows = []
+    for name in backend_names:
+        try:
+            backend = BACKENDS[name]()
+        except (ImportError, OSError) as e:
+            print(f"Skipping backend {name}: {e}")
+            continue
+        for path in PATHS:
+            if path == 'slider' and not backend.supports_slider:
+                continue
+            for trial in range(n_trials):
+                if 'escape' in event.getKeys(keyList=['escape']):
+                    backend.close()
+                    return rows
+                event.clearEvents()
+                delay = random.uniform(min_delay, max_delay)
+                if path == 'waitKeys':
+                    measured, true_rt = _trial_waitkeys(win, stim, rt_clock, backend, delay)
+                elif path == 'getKeys':
+                    measured, true_rt = _trial_getkeys(win, stim, rt_clock, backend, delay)
+                else:
+                    measured, true_rt = _trial_slider(win, slider, rt_clock, backend, delay)
+                rows.append({'backend': name, 'path': path, 'trial': trial + 1,
+                             'true_rt': true_rt, 'measured_rt': measured,
+                             'error_ms': (measured - true_rt) * 1000.0})
+                win.flip()
+                core.wait(0.1)
+        backend.close()
+    return rows
+
+
+def summarize(rows):
+    """Bias (mean error) and jitter (SD, percentiles) per backend x path, in ms."""
+    summary = []
+    cells = sorted({(r['backend'], r['path']) for r in rows})
+    for backend, path in cells:
+        err = np.array([r['error_ms'] for r in rows if r['backend'] == backend and r['path'] == path])
+        missed = int(np.isnan(err).sum())
+        err = err[~np.isnan(err)]
+        if err.size == 0:
+            summary.append({'backend': backend, 'path': path, 'n': 0, 'missed': missed})
+            continue
+        p5, p50, p95 = np.percentile(err, [5, 50, 95])
+        summary.append({'backend': backend, 'path': path, 'n': int(err.size), 'missed': missed,
+                        'bias_ms': float(err.mean()), 'jitter_sd_ms': float(err.std()),
+                        'p5_ms': float(p5), 'median_ms': float(p50), 'p95_ms': float(p95)})
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RT-accuracy loopback benchmark")
+    parser.add_argument('--backends', nargs='+', default=['injected'], choices=list(BACKENDS))
+    parser.add_argument('--n', type=int, default=50, help="trials per backend and path")
+    parser.add_argument('--windowed', action='store_true')
+    parser.add_argument('--out', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    win = visual.Window(size=(1920, 1080), fullscr=not args.windowed, color='black',
+                        units='pix', allowGUI=False)
+    win.monitorFramePeriod = 1.0 / 120.0
+    rows = run_benchmark(win, args.backends, args.n)
+    win.close()
+
+    with open(args.out, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=['backend', 'path', 'trial',
+                                                     'true_rt', 'measured_rt', 'error_ms'])
+        writer.writeheader()
+        writer.writerows(rows)
+    for s in summarize(rows):
+        if not s['n']:
+            print(f"{s['backend']:>9} {s['path']:>8}: no responses detected ({s['missed']} missed)")
+            continue
+        print(f"{s['backend']:>9} {s['path']:>8}: n={s['n']} bias {s['bias_ms']:+.2f} ms, "
+              f"jitter SD {s['jitter_sd_ms']:.2f} ms, 5-95% [{s['p5_ms']:+.2f}, {s['p95_ms']:+.2f}] ms, "
+              f"{s['missed']} missed")
+    print(f"Trials saved to {args.out}")
+    core.quit()
@@ -0,0 +1,138 @@
+"""
+Ex-Gaussian RT models per participant x valence Type x response.
+
+Fits mu, sigma and tau to every RT measure saved by sess 2
+(recognition, belief, memory and the two challenge ratings). Each
+participant is fitted in a separate process and the fits are cached in
+rt_fits/, keyed on the results file's size and modification time, so
+only new or changed participants are refitted:
+
+    python rt_models.py            -> rt_exgauss.csv
+"""
+import argparse, os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+from scipy.special import log_ndtr
+from results_io import participant_files, read_results, RESULTS_PATTERN
+
+CACHE_DIR = 'rt_fits'
+OUTPUT_FILE = 'rt_exgauss.csv'
+MIN_TRIALS = 10  # cells with fewer RTs are reported but not fitted
+
+# measure -> RT column
+RT_MEASURES = {
+    'recognition': 'recognition_rt',
+    'belief': 'belief_rt',
+    'memory': 'memory_rt',
+    'challenge_belief': 'challenge_belief_rt',
+    'challenge_memory': 'challenge_memory_rt',
+}
+
+
+# ---------------------------------------------------------
+# Ex-Gaussian likelihood
+# ---------------------------------------------------------
+def exgauss_logpdf(x, mu, sigma, tau):
+    """Log density of the ex-Gaussian, vectorized over x."""
+    return (-np.log(tau) + (mu - x) / tau + sigma ** 2 / (2 * tau ** 2)
+            + log_ndtr((x - mu) / sigma - sigma / tau))
+
+
+def _neg_log_lik(params, x):
+    mu, log_sigma, log_tau = params
+    return -exgauss_logpdf(x, mu, np.exp(log_sigma), np.exp(log_tau)).sum()
+
+
+def fit_exgauss(x):
+    """
+    Maximum-likelihood mu, sigma, tau for the RTs in x (seconds).
+    Starts from the method-of-moments estimates.
+    """
+    x = np.asarray(x, dtype=float)
+    mean, sd = x.mean(), x.std()
+    skew = ((x - mean) ** 3).mean() / sd ** 3 if sd > 0 else 0.0
+    tau = sd * np.clip(skew / 2, 0.05, 0.9) ** (1 / 3)
+    sigma = np.sqrt(max(sd ** 2 - tau ** 2, (0.1 * sd) ** 2, 1e-6))
+    start = [mean - tau, np.log(sigma), np.log(max(tau, 1e-3))]
+    result = minimize(_neg_log_lik, start, args=(x,), method='Nelder-Mead',
+                      options={'xatol': 1e-5, 'fatol': 1e-6, 'maxiter': 2000})
+    mu, log_sigma, log_tau = result.x
+    return mu, np.exp(log_sigma), np.exp(log_tau), result.success
+
+
+# ---------------------------------------------------------
+# Per-participant fits
+# ---------------------------------------------------------
+def rt_long(df):
+    """RTs in long format: participant, Type, response, measure, rt."""
+    frames = []
+    for measure, column in RT_MEASURES.items():
+        part = df[['participant', 'Type', 'recognition_response', column]].dropna(subset=[column])
+        part = part.rename(columns={'recognition_response': 'response', column: 'rt'})
+        part.insert(3, 'measure', measure)
+        frames.append(part)
+    return pd.concat(frames, ignore_index=True)
+
+
+def fit_participant(participant, path):
+    """Fit every Type x response x measure cell of one participant."""
+    long_df = rt_long(read_results(path, participant))
+    rows = []
+    for (p, word_type, response, measure), cell in long_df.groupby(
+            ['participant', 'Type', 'response', 'measure'], sort=True):
+        rt = cell['rt'].to_numpy()
+        row = {'participant': p, 'Type': word_type, 'response': response,
+               'measure': measure, 'n': len(rt),
+               'mu': np.nan, 'sigma': np.nan, 'tau': np.nan, 'converged': False}
+        if len(rt) >= MIN_TRIALS:
+            row['mu'], row['sigma'], row['tau'], row['converged'] = fit_exgauss(rt)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _cache_file(cache_dir, participant, path):
+    stat = os.stat(path)
+    return os.path.join(cache_dir, f"{participant}_{stat.st_size}_{stat.st_mtime_ns}.csv")
+
+
+def _fit_and_cache(participant, path, cache_file):
+    fits = fit_participant(participant, path)
+    fits.to_csv(cache_file, index=False)
+    return fits
+
+
+def fit_study(pattern=RESULTS_PATTERN, cache_dir=CACHE_DIR, processes=None):
+    """
+    Ex-Gaussian fits for all participants. Cached fits are reused;
+    the others are spread over a process pool.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    fits, todo = [], []
+    for participant, path in participant_files(pattern).items():
+        cache_file = _cache_file(cache_dir, participant, path)
+        if os.path.exists(cache_file):
+            fits.append(pd.read_csv(cache_file, dtype={'participant': str}))
+        else:
+            todo.append((participant, path, cache_file))
+
+    print(f"{len(fits)} participant(s) cached, {len(todo)} to fit")
+    if todo:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            fits.extend(pool.map(_fit_and_cache, *zip(*todo)))
+    if not fits:
+        return pd.DataFrame()
+    return pd.concat(fits, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ex-Gaussian RT fits")
+    parser.add_argument('--pattern', default=RESULTS_PATTERN)
+    parser.add_argument('--out', default=OUTPUT_FILE)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    fits = fit_study(args.pattern, processes=args.processes)
+    fits.to_csv(args.out, index=False)
+    print(f"Fits saved to {args.out}")
@@ -5,11 +5,24 @@ import pygame
 import sys
 import math
 import time
+from prewarm import prewarm_glyphs, FlipDeadlineLog
+from pacing import FramePacer, print_summary, save_histogram, measure_refresh_rate, refresh_matches
+from realtime import RealtimeSection
+from leaktrack import LeakTracker
+from stimulus_store import participant_sheet
 
 
 os.chdir(r"https://github.com/Raagul-tr/NBM")
 
-def run_psychopy_experiment():
+# Real-time mode for the word stream (see realtime.py)
+# off by default; switch on per station once frame_jitter.csv shows it helps
+REALTIME = False
+REALTIME_CPU = None  # e.g. 2 to pin the process to core 2
+
+# Per-trial heap/stimulus/texture tracking for test runs (see leaktrack.py)
+TRACK_LEAKS = False
+
+def run_psychopy_experiment(excel_file="stim_96.xlsx"):
     # Monitor specs
     myMon = monitors.Monitor('myMonitor')
     myMon.setSizePix((1920, 1080))
@@ -29,7 +42,6 @@ def run_psychopy_experiment():
     win.monitorFramePeriod = 1.0 / 120.0
 
     # file name
-    excel_file = "stim_96.xlsx"  
     if not os.path.exists(excel_file):
         print("Error: Excel file not found!")
         win.close()
@@ -54,19 +66,13 @@ def run_psychopy_experiment():
         color='white',
         wrapWidth=1500
     )
-    begin_text.draw()
-    win.flip()
-    keys = event.waitKeys(keyList=['space', 'escape'])
-    if keys and keys[0] == 'escape':
-        win.close()
-        return False  
-    # Present the Words 
-    for word in words_list:
-        if 'escape' in event.getKeys(keyList=['escape']):
-            win.close()
-            return False  
-        
-        word_stim = visual.TextStim(
+    # get every glyph into the font atlas before the first word
+    prewarm_glyphs(win, words_list + [begin_text.text, "Press SPACE to continue"], heights=(36, 40))
+    flip_log = FlipDeadlineLog(win, "Word presentation")
+
+    # all word stimuli are built before the stream starts
+    word_stims = [
+        visual.TextStim(
             win=win,
             text=str(word),
             font='Arial',
@@ -74,11 +80,38 @@ def run_psychopy_experiment():
             color='white',
             wrapWidth=1500
         )
-        word_stim.draw()
-        win.flip()
-        core.wait(1.5)  # duration1 (Present each word for 1.5 s) 
-        win.flip()     
-        core.wait(0.5)  # duration2. ISI of 0.5 s) 
+        for word in words_list
+    ]
+
+    begin_text.draw()
+    win.flip()
+    keys = event.waitKeys(keyList=['space', 'escape'])
+    if keys and keys[0] == 'escape':
+        win.close()
+        return False  
+    # Present the Words 
+    leak_tracker = LeakTracker("Word presentation", TRACK_LEAKS)
+    with RealtimeSection(win, "Word presentation", REALTIME, REALTIME_CPU) as rt_section:
+        t_offset = None
+        for trial_no, (word, word_stim) in enumerate(zip(words_list, word_stims), 1):
+            if 'escape' in event.getKeys(keyList=['escape']):
+                win.close()
+                return False  
+            
+            flip_log.start()
+            word_stim.draw()
+            t_onset = win.flip()
+            flip_log.check(t_onset, str(word))
+            if t_offset is not None:
+                rt_section.timed(0.5, t_offset, t_onset)
+            core.wait(1.5)  # duration1 (Present each word for 1.5 s) 
+            t_offset = win.flip()     
+            rt_section.timed(1.5, t_onset, t_offset)
+            rt_section.collect()
+            leak_tracker.snapshot(trial_no)
+            core.wait(max(0, 0.5 - (core.getTime() - t_offset)))  # duration2. ISI of 0.5 s) 
+    flip_log.report()
+    leak_tracker.report("leaks_word_presentation.csv")
     # End experiment msg
     end_text = visual.TextStim(
         win=win,
@@ -98,8 +131,12 @@ def run_psychopy_experiment():
     win.close()
     return True  # Return True for successful completion
 
-def run_pygame_game():
+def run_pygame_game(pacing='tick', vsync=False, fullscreen=False, histogram_file=None):
     # distractor task
+    # pacing: 'tick', 'busy', 'hybrid' or 'vsync' (see pacing.FramePacer)
+    # vsync/fullscreen use a SCALED display, so the 400x600 game is scaled up
+    # pacing='vsync' turns vsync on; the physics is per frame, so it falls
+    # back to 'hybrid' unless the display refreshes at FPS
     pygame.init()
 
     # Constants
@@ -119,9 +156,28 @@ def run_pygame_game():
     GROUND_COLOR = (222, 216, 149)
 
     # Set up the display
-    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    if pacing == 'vsync':
+        vsync = True
+    flags = 0
+    if vsync or fullscreen:
+        flags |= pygame.SCALED
+    if fullscreen:
+        flags |= pygame.FULLSCREEN
+    try:
+        screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), flags, vsync=int(vsync))
+    except pygame.error as e:
+        print(f"WARNING: vsync not available ({e}), continuing without it")
+        screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), flags)
+        if pacing == 'vsync':
+            pacing = 'hybrid'
+    if pacing == 'vsync':
+        refresh = measure_refresh_rate()
+        if not refresh_matches(refresh, FPS):
+            print(f"WARNING: display refreshes at {refresh:.1f} Hz, not {FPS} Hz; "
+                  f"pacing with 'hybrid' instead of 'vsync'")
+            pacing = 'hybrid'
     pygame.display.set_caption('Flappy Bird')
-    clock = pygame.time.Clock()
+    pacer = FramePacer(FPS, pacing)
 
     def create_bird_surface():
         surface = pygame.Surface((40, 30), pygame.SRCALPHA)
@@ -392,14 +448,34 @@ def run_pygame_game():
                             WINDOW_HEIGHT * 2 // 3))
 
             pygame.display.flip()
-            clock.tick(FPS)
+            pacer.wait()
 
     main()
 
+    # frame smoothness of this station
+    print_summary(f"Distractor frames ({pacing})", pacer.intervals, pacer.period)
+    if histogram_file:
+        save_histogram(pacer.intervals, histogram_file)
+        print(f"Frame-interval histogram saved to {histogram_file}")
+
 if __name__ == "__main__":
-    psychopy_success = run_psychopy_experiment()
+    # study list: stim_<Participant>.xlsx from stimulus_store.py if one was
+    # drawn, else stim_96.xlsx (same rule as sess 2); a file given on the
+    # command line overrides it
+    if len(sys.argv) > 1:
+        excel_file = sys.argv[1]
+        print(f"Study list (command line): {excel_file}")
+    else:
+        expInfo = {'Participant': ''}
+        dlg = gui.DlgFromDict(dictionary=expInfo, title="Study Phase")
+        if not dlg.OK:
+            core.quit()
+        excel_file = participant_sheet('stim', expInfo['Participant'])
+        print(f"Study list for participant {expInfo['Participant']}: {excel_file}")
+    psychopy_success = run_psychopy_experiment(excel_file)
     # Only run the Pygame game if the PsychoPy experiment completed successfully
     if psychopy_success:
-        run_pygame_game()
+        run_pygame_game(pacing='tick', vsync=False, fullscreen=False,
+                        histogram_file="frame_intervals_distractor.csv")
     else:
         print("PsychoPy experiment was terminated early. Exiting.")
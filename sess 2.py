@@ -1,9 +1,44 @@
 from psychopy import visual, core, event, data, gui, monitors
-import os, csv, random
-import pandas as pd
+import os, random
+from collector import push_results
+from stimulus_store import participant_sheet
+from prewarm import prewarm_glyphs, FlipDeadlineLog
+from prefetch import Prefetcher
+from realtime import RealtimeSection
+from leaktrack import LeakTracker
+from trials import (load_trial_table, challenge_plan, write_results, to_records,
+                    FEEDBACK_CHALLENGED, FEEDBACK_RECOGNIZED, FEEDBACK_REJECTED)
 
 os.chdir(r"https://github.com/Raagul-tr/NBM")
 
+# Real-time mode for the recognition onsets and the dot display (see realtime.py)
+# off by default; switch on per station once frame_jitter.csv shows it helps
+REALTIME = False
+REALTIME_CPU = None  # e.g. 2 to pin the process to core 2
+
+# Per-trial heap/stimulus/texture tracking for test runs (see leaktrack.py)
+TRACK_LEAKS = False
+
+# Results collector this station pushes to (see collector.py)
+COLLECTOR_HOST = '127.0.0.1'
+COLLECTOR_PORT = 8765
+
+# Rating questions
+MEMORY_QUESTION = (
+    "Do you actually remember that this word has appeared before?\n"
+    "(1 = no memory of the word at all, 8 = clear and complete memory)"
+)
+BELIEF_QUESTION = (
+    "Do you believe that this word has appeared before\n"
+    "(regardless of whether you remember or not)?\n"
+    "(1 = definitely did not happen, 8 = definitely did happen)"
+)
+CHALLENGE_BELIEF_QUESTION = (
+    "Do you still believe that this word has appeared before\n"
+    "(regardless of whether you remember or not)?\n\n"
+    "(1 = definitely did not happen, 8 = definitely did happen)"
+)
+
 # ---------------------------------------------------------
 # Utility: Get slider response with the specified question
 # ---------------------------------------------------------
@@ -36,15 +71,17 @@ def get_slider_response(win, question, slider, rt_clock):
 
 # RECOGNITION PHASE
 
-def run_recognition_phase(win, slider, rt_clock, excel_file):
+def run_recognition_phase(win, slider, rt_clock, excel_file, prefetcher=None):
     """
     1. Shows instructions.
     2. Loads words from the Excel file (columns: words, Type, old_new, y_n)
-       and adds an 'excel_order' field.
+       into a trial table (see trials.py) with an 'excel_order' column.
     3. Randomizes the presentation order.
     4. key response ('y' or 'n').
        If the participant presses 'y', two 8-point ratings (belief and memory) 
-    5. A new field 'presentation_order' is added to the trial data.
+    5. The 'presentation_order' column holds the order of each trial.
+    The trial table is filled in place and returned. If main already
+    started loading it on the prefetcher (job 'trials'), that is used.
      """
    
     instructions = visual.TextStim(
@@ -80,88 +117,80 @@ def run_recognition_phase(win, slider, rt_clock, excel_file):
     )
     ready_text.draw()
     win.flip()
-    key = event.waitKeys(keyList=['space', 'escape'])
-    if key and key[0]=='escape':
-        win.close()
-        core.quit()
 
+    # Prepare the trials while the participant reads the screen
     if not os.path.exists(excel_file):
         print(f"Error: File {excel_file} not found!")
         win.close()
         core.quit()
 
-    df = pd.read_excel(excel_file)
-    df['excel_order'] = df.index
-    df = df.sample(frac=1).reset_index(drop=True)
-
-    trial_list = []
-    for i, row in df.iterrows():
-        trial_data = {}
-        trial_data['excel_order'] = row['excel_order']
-        trial_data['presentation_order'] = i + 1  # record order
-        trial_data['word'] = str(row['words'])
-        trial_data['Type'] = str(row['Type'])
-        trial_data['old_new'] = str(row['old_new'])
-        trial_data['y_n'] = str(row['y_n']).strip().lower()
-
-        word_stim = visual.TextStim(
+    if prefetcher is not None and prefetcher.has('trials'):
+        trial_table = prefetcher.get('trials')
+    else:
+        trial_table = load_trial_table(excel_file)
+
+    # get every glyph into the font atlas before the first trial
+    # (drawn to the back buffer only; the ready screen stays up)
+    texts = [instructions.text, ready_text.text, MEMORY_QUESTION, BELIEF_QUESTION]
+    prewarm_glyphs(win, list(trial_table['word']) + texts, heights=(36, 48))
+    flip_log = FlipDeadlineLog(win, "Recognition phase")
+    word_stims = [
+        visual.TextStim(
             win=win,
-            text=trial_data['word'],
+            text=str(word),
             font='Arial',
             height=48,
             color='white',
             wrapWidth=1500
         )
-        word_stim.draw()
-        win.flip()
+        for word in trial_table['word']
+    ]
 
-        rt_clock.reset()
-        keys = event.waitKeys(keyList=['y', 'n', 'escape'], timeStamped=rt_clock)
-        if not keys:
-            continue  
-        response_key, response_rt = keys[0]
-        if response_key == 'escape':
-            win.close()
-            core.quit()
-        trial_data['recognition_response'] = response_key
-        trial_data['recognition_rt'] = response_rt
-
-        if response_key == 'y':
-            memory_question = (
-                "Do you actually remember that this word has appeared before?\n"
-                "(1 = no memory of the word at all, 8 = clear and complete memory)"
-            )
-            memory_rating, memory_rt = get_slider_response(win, memory_question, slider, rt_clock)
-            belief_question = (
-                "Do you believe that this word has appeared before\n"
-                "(regardless of whether you remember or not)?\n"
-                "(1 = definitely did not happen, 8 = definitely did happen)"
-            )
-            belief_rating, belief_rt = get_slider_response(win, belief_question, slider, rt_clock)
+    key = event.waitKeys(keyList=['space', 'escape'])
+    if key and key[0]=='escape':
+        win.close()
+        core.quit()
+
+    leak_tracker = LeakTracker("Recognition phase", TRACK_LEAKS)
+    with RealtimeSection(win, "Recognition onsets", REALTIME, REALTIME_CPU) as rt_section:
+        t_blank = None
+        for i in range(len(trial_table)):
+            trial = trial_table[i]  # a view: assignments go into trial_table
+
+            flip_log.start()
+            word_stims[i].draw()
+            t_onset = win.flip()
+            flip_log.check(t_onset, str(trial['word']))
+            if t_blank is not None:
+                rt_section.timed(0.3, t_blank, t_onset)
+
+            rt_clock.reset()
+            keys = event.waitKeys(keyList=['y', 'n', 'escape'], timeStamped=rt_clock)
+            if not keys:
+                continue  
+            response_key, response_rt = keys[0]
+            if response_key == 'escape':
+                win.close()
+                core.quit()
+            trial['recognition_response'] = response_key
+            trial['recognition_rt'] = response_rt
+
+            if response_key == 'y':
+                memory_rating, memory_rt = get_slider_response(win, MEMORY_QUESTION, slider, rt_clock)
+                belief_rating, belief_rt = get_slider_response(win, BELIEF_QUESTION, slider, rt_clock)
             
-            trial_data['belief_rating'] = belief_rating
-            trial_data['belief_rt'] = belief_rt
-            trial_data['memory_rating'] = memory_rating
-            trial_data['memory_rt'] = memory_rt
-        else:
-            trial_data['belief_rating'] = None
-            trial_data['belief_rt'] = None
-            trial_data['memory_rating'] = None
-            trial_data['memory_rt'] = None
-
-        # challenge rating 
-        trial_data['challenge_belief_rating'] = None
-        trial_data['challenge_belief_rt'] = None
-        trial_data['challenge_memory_rating'] = None
-        trial_data['challenge_memory_rt'] = None
-
-        # feedback message 
-        trial_data['feedback_message'] = ""
-        
-        trial_list.append(trial_data)
-        win.flip()
-        core.wait(0.3)
-    return trial_list
+                trial['belief_rating'] = belief_rating
+                trial['belief_rt'] = belief_rt
+                trial['memory_rating'] = memory_rating
+                trial['memory_rt'] = memory_rt
+
+            t_blank = win.flip()
+            rt_section.collect()
+            leak_tracker.snapshot(i + 1)
+            core.wait(max(0, 0.3 - (core.getTime() - t_blank)))
+    flip_log.report()
+    leak_tracker.report("leaks_recognition.csv")
+    return trial_table
 
 
 # FILLER TASK 
@@ -199,118 +228,122 @@ def run_filler_task(win, duration=10):  #duration
         win.close()
         core.quit()
 
+    # Stimuli are built once and reused on every trial
+    box_width, box_height = 0.8, 1.6  
+    left_box = visual.Rect(win, width=box_width, height=box_height, pos=(-0.5, 0),
+                          lineColor="white", fillColor=None, lineWidth=2)
+    right_box = visual.Rect(win, width=box_width, height=box_height, pos=(0.5, 0),
+                           lineColor="white", fillColor=None, lineWidth=2)
+    left_dot_stims = [visual.Circle(win, radius=0.02, fillColor="red", lineColor=None)
+                      for _ in range(30)]
+    right_dot_stims = [visual.Circle(win, radius=0.02, fillColor="red", lineColor=None)
+                       for _ in range(30)]
+    question = visual.TextStim(win, text="Which box has more dots?", pos=(0, -0.1),
+                             height=0.07, color="white")
+    left_text = visual.TextStim(win, text="Press 'A' for left", pos=(-0.7, -0.3),
+                              height=0.07, color="white")
+    right_text = visual.TextStim(win, text="Press 'L' for right", pos=(0.7, -0.3),
+                               height=0.07, color="white")
+    feedback_text = visual.TextStim(win, text="", pos=(0, 0), height=0.1, color="yellow")
+
+    # dot positions 
+    left_x_min = -0.8
+    left_x_max = -0.2
+    left_y_min = -0.7
+    left_y_max = 0.7
+    
+    right_x_min = 0.2
+    right_x_max = 0.8
+    right_y_min = -0.7
+    right_y_max = 0.7
+
     global_clock = core.Clock()
     global_clock.reset()  # Start the clock
     trial_count = 0
     
-    # Main task loop - runs until duration is reached
-    # Only exit early if very little time remains (< 3 seconds)
-    while global_clock.getTime() < (duration - 3):
-        trial_count += 1
-        trial_start_time = global_clock.getTime()
-        remaining_time = duration - trial_start_time
-        
-        print(f"Trial {trial_count}: {trial_start_time:.2f}s elapsed, {remaining_time:.2f}s remaining")
-            
-        keys = event.getKeys(keyList=["escape"])
-        if "escape" in keys:
-            win.close()
-            core.quit()
+    leak_tracker = LeakTracker("Filler task", TRACK_LEAKS)
+    with RealtimeSection(win, "Dot display", REALTIME, REALTIME_CPU) as rt_section:
+        # Main task loop - runs until duration is reached
+        # Only exit early if very little time remains (< 3 seconds)
+        while global_clock.getTime() < (duration - 3):
+            trial_count += 1
+            trial_start_time = global_clock.getTime()
+            remaining_time = duration - trial_start_time
             
-        # Create stimuli 
-        left_dots = random.randint(10, 30)
-        right_dots = random.randint(10, 30)
-        
-        box_width, box_height = 0.8, 1.6  
+            print(f"Trial {trial_count}: {trial_start_time:.2f}s elapsed, {remaining_time:.2f}s remaining")
+                
+            keys = event.getKeys(keyList=["escape"])
+            if "escape" in keys:
+                win.close()
+                core.quit()
+                
+            left_dots = random.randint(10, 30)
+            right_dots = random.randint(10, 30)
 
-        # boxes
-        left_box = visual.Rect(win, width=box_width, height=box_height, pos=(-0.5, 0),
-                              lineColor="white", fillColor=None, lineWidth=2)
-        right_box = visual.Rect(win, width=box_width, height=box_height, pos=(0.5, 0),
-                               lineColor="white", fillColor=None, lineWidth=2)
-        
-        # dot positions 
-        left_x_min = -0.8
-        left_x_max = -0.2
-        left_y_min = -0.7
-        left_y_max = 0.7
-        
-        right_x_min = 0.2
-        right_x_max = 0.8
-        right_y_min = -0.7
-        right_y_max = 0.7
-
-        # Draw boxes first
-        left_box.draw()
-        right_box.draw()
-        
-        # Draw left dots
-        for _ in range(left_dots):
-            x = random.uniform(left_x_min, left_x_max)
-            y = random.uniform(left_y_min, left_y_max)
-            dot = visual.Circle(win, radius=0.02, pos=(x, y),
-                               fillColor="red", lineColor=None)
-            dot.draw()
+            # Draw boxes first
+            left_box.draw()
+            right_box.draw()
             
-        # Draw right dots
-        for _ in range(right_dots):
-            x = random.uniform(right_x_min, right_x_max)
-            y = random.uniform(right_y_min, right_y_max)
-            dot = visual.Circle(win, radius=0.02, pos=(x, y),
-                               fillColor="red", lineColor=None)
-            dot.draw()
-
-        win.flip()
-        core.wait(0.75)
-        win.flip()
-        core.wait(0.3)
-
-        # Show question and response options
-        question = visual.TextStim(win, text="Which box has more dots?", pos=(0, -0.1),
-                                 height=0.07, color="white")
-        left_text = visual.TextStim(win, text="Press 'A' for left", pos=(-0.7, -0.3),
-                                  height=0.07, color="white")
-        right_text = visual.TextStim(win, text="Press 'L' for right", pos=(0.7, -0.3),
-                                   height=0.07, color="white")
-        question.draw()
-        left_text.draw()
-        right_text.draw()
-        win.flip()
+            # Draw left dots
+            for dot in left_dot_stims[:left_dots]:
+                dot.pos = (random.uniform(left_x_min, left_x_max),
+                           random.uniform(left_y_min, left_y_max))
+                dot.draw()
+                
+            # Draw right dots
+            for dot in right_dot_stims[:right_dots]:
+                dot.pos = (random.uniform(right_x_min, right_x_max),
+                           random.uniform(right_y_min, right_y_max))
+                dot.draw()
+
+            t_onset = win.flip()
+            core.wait(0.75)
+            t_offset = win.flip()
+            rt_section.timed(0.75, t_onset, t_offset)
+            rt_section.collect()
+            leak_tracker.snapshot(trial_count)
+            core.wait(max(0, 0.3 - (core.getTime() - t_offset)))
+
+            # Show question and response options
+            question.draw()
+            left_text.draw()
+            right_text.draw()
+            win.flip()
 
-        # Calculate how much time is left for this trial's response
-        response_time_limit = min(2.0, duration - global_clock.getTime())
-        
-        # Only wait for a response if we have time
-        if response_time_limit > 0.1:  # At least 100ms to respond
-            event.clearEvents()  
-            keys = event.waitKeys(keyList=["a", "l", "escape"], maxWait=response_time_limit)
+            # Calculate how much time is left for this trial's response
+            response_time_limit = min(2.0, duration - global_clock.getTime())
             
-            if keys:
-                response = keys[0]
-                if response == "escape":
-                    win.close()
-                    core.quit()
-                else:
-                    correct_response = "a" if left_dots > right_dots else "l"
-                    feedback = "Correct!" if response == correct_response else "Incorrect!"
+            # Only wait for a response if we have time
+            if response_time_limit > 0.1:  # At least 100ms to respond
+                event.clearEvents()  
+                keys = event.waitKeys(keyList=["a", "l", "escape"], maxWait=response_time_limit)
                 
-                # Show feedback, but check time remaining first
-                if global_clock.getTime() < duration - 1.5:
-                    feedback_text = visual.TextStim(win, text=feedback, pos=(0, 0),
-                                                  height=0.1, color="yellow")
-                    feedback_text.draw()
-                    win.flip()
+                if keys:
+                    response = keys[0]
+                    if response == "escape":
+                        win.close()
+                        core.quit()
+                    else:
+                        correct_response = "a" if left_dots > right_dots else "l"
+                        feedback = "Correct!" if response == correct_response else "Incorrect!"
                     
-                    # Show feedback for a maximum of 1.5 seconds
-                    feedback_time = min(1.5, duration - global_clock.getTime() - 0.1)
-                    if feedback_time > 0:
-                        core.wait(feedback_time)
-            
-        # Brief pause between trials if time allows
-        remaining_time = duration - global_clock.getTime()
-        if remaining_time > 0.5:
-            core.wait(0.2)
+                    # Show feedback, but check time remaining first
+                    if global_clock.getTime() < duration - 1.5:
+                        feedback_text.text = feedback
+                        feedback_text.draw()
+                        win.flip()
+                        
+                        # Show feedback for a maximum of 1.5 seconds
+                        feedback_time = min(1.5, duration - global_clock.getTime() - 0.1)
+                        if feedback_time > 0:
+                            core.wait(feedback_time)
+                
+            # Brief pause between trials if time allows
+            remaining_time = duration - global_clock.getTime()
+            if remaining_time > 0.5:
+                core.wait(0.2)
     
+    leak_tracker.report("leaks_filler.csv")
     final_time = global_clock.getTime()
     print(f"Filler task completed: {final_time:.2f} seconds, {trial_count} trials")
     win.setUnits(old_units)
@@ -319,17 +352,13 @@ def run_filler_task(win, duration=10):  #duration
 
 # CHALLENGE PHASE
 
-def run_challenge_phase(win, slider, rt_clock, trial_list):
+def make_feedback_stims(win):
     """
-    Processes the trial_list in presentation order after pre-filtering
-    Pre-filtering:
-      - Skip any trial where the participant pressed 'y' but trial['y_n'] is 'n'
-      - Skip any trial where the participant pressed 'n' but trial['old_new'] is 'new'
-      - If the participant pressed 'n':
-           *feedback "You correctly rejected the word" (in green) with a SPACE prompt
+    The challenge phase's screens. They do not depend on the responses,
+    so main builds them while the proceed screen is up.
     """
-    # feedback instru.
-    feedback_instr = visual.TextStim(
+    stims = {}
+    stims['instructions'] = visual.TextStim(
         win=win,
         text="Here is your Feedback on your answers\n\nOur memories are prone to distortions and false memories. Check how good is your memory\n\nYou're required to give the ratings again for wrong responses\n\nPress SPACE to continue",
         font='Arial',
@@ -337,57 +366,94 @@ def run_challenge_phase(win, slider, rt_clock, trial_list):
         color='white',
         wrapWidth=1500
     )
-    feedback_instr.draw()
+    stims['word'] = visual.TextStim(
+        win=win,
+        text="",
+        font='Arial',
+        height=48,
+        color='white',
+        wrapWidth=1500,
+        pos=(0, 100)
+    )
+    stims['challenge'] = visual.TextStim(
+        win=win,
+        text="Sorry, this answer was incorrect\nThis word was not presented\n\nAgain provide your memory & belief ratings\n\nPress SPACE to continue",
+        font='Arial',
+        height=40,
+        color='red',
+        wrapWidth=1500,
+        pos=(0, -100)
+    )
+    stims['recognized'] = visual.TextStim(
+        win=win,
+        text=(
+            "Congratulations, your answer was correct\n"
+            "You correctly recognized the word\n\n\n"
+            "Press SPACE to continue"
+        ),
+        font='Arial',
+        height=36,
+        color='green',
+        wrapWidth=1500,
+        pos=(0, -100)
+    )
+    stims['rejected'] = visual.TextStim(
+        win=win,
+        text=(
+            "Congratulations, your answer was correct\n"
+            "You correctly rejected the word\n\n"
+            "Press SPACE to continue"
+        ),
+        font='Arial',
+        height=36,
+        color='green',
+        wrapWidth=1500,
+        pos=(0, -100)
+    )
+    return stims
+
+
+def run_challenge_phase(win, slider, rt_clock, trial_table, plan=None, stims=None):
+    """
+    Processes the trial_table in presentation order after pre-filtering
+    Pre-filtering:
+      - Skip any trial where the participant pressed 'y' but trial['y_n'] is 'n'
+      - Skip any trial where the participant pressed 'n' but trial['old_new'] is 'new'
+      - If the participant pressed 'n':
+           *feedback "You correctly rejected the word" (in green) with a SPACE prompt
+    plan (from challenge_plan) and stims (from make_feedback_stims) can be
+    prepared during the filler; they are built here otherwise.
+    """
+    if stims is None:
+        stims = make_feedback_stims(win)
+    # Pre-filtered trials in presentation order, and which 'y' responses get challenged
+    if plan is None:
+        plan = challenge_plan(trial_table)
+    trial_idx, challenged = plan
+
+    # feedback instru.
+    stims['instructions'].draw()
     win.flip()
     key = event.waitKeys(keyList=['space', 'escape'])
     if key and key[0] == 'escape':
         win.close()
         core.quit()
 
-    # Pre-filter the trial list
-    filtered_trials = [trial for trial in trial_list 
-                       if not (trial['recognition_response'] == 'n' and trial['y_n'].strip().lower() == 'y')]
-
-
-    # Sort filtered trials by presentation order.
-    sorted_trials = sorted(filtered_trials, key=lambda x: x['presentation_order'])
-    recognized_counter = 0  # Count recognized ('y') responses only.
-
-    for trial in sorted_trials:
+    word_stim = stims['word']
+    leak_tracker = LeakTracker("Challenge phase", TRACK_LEAKS)
+    for trial_no, (i, is_challenged) in enumerate(zip(trial_idx, challenged), 1):
+        trial = trial_table[i]
         # Clear the window at the start of each trial.
         win.flip()
-        word_str = trial['word']
         
         # Display the word in white at the top.
-        word_stim = visual.TextStim(
-            win=win,
-            text=word_str,
-            font='Arial',
-            height=48,
-            color='white',
-            wrapWidth=1500,
-            pos=(0, 100)
-        )
+        word_stim.text = str(trial['word'])
         word_stim.draw()
 
         if trial['recognition_response'] == 'y':
-            recognized_counter += 1
-            if recognized_counter % 3 == 0:
+            if is_challenged:
                 # Challenge trial: display challenge message in red.
-                challenge_text = (
-                    "Sorry, this answer was incorrect\nThis word was not presented\n\nAgain provide your memory & belief ratings\n\nPress SPACE to continue"
-                    
-                )
-                challenge_stim = visual.TextStim(
-                    win=win,
-                    text=challenge_text,
-                    font='Arial',
-                    height=40,
-                    color='red',
-                    wrapWidth=1500,
-                    pos=(0, -100)
-                )
-                challenge_stim.draw()
+                stims['challenge'].draw()
                 win.flip()
                 core.wait(0.8)
                 
@@ -395,81 +461,33 @@ def run_challenge_phase(win, slider, rt_clock, trial_list):
                 if key_challenge and key_challenge[0] == 'escape':
                     win.close()
                     core.quit()
-                memory_question = (
-                    "Do you actually remember that this word has appeared before?\n"
-                    "(1 = no memory of the word at all, 8 = clear and complete memory)"
-                )
-                new_memory_rating, new_memory_rt = get_slider_response(win, memory_question, slider, rt_clock)
-                belief_question = (
-                    "Do you still believe that this word has appeared before\n"
-                    "(regardless of whether you remember or not)?\n\n"
-                    "(1 = definitely did not happen, 8 = definitely did happen)"
-                )
-                new_belief_rating, new_belief_rt = get_slider_response(win, belief_question, slider, rt_clock)
+                new_memory_rating, new_memory_rt = get_slider_response(win, MEMORY_QUESTION, slider, rt_clock)
+                new_belief_rating, new_belief_rt = get_slider_response(win, CHALLENGE_BELIEF_QUESTION, slider, rt_clock)
                 
                 trial['challenge_belief_rating'] = new_belief_rating
                 trial['challenge_belief_rt'] = new_belief_rt
                 trial['challenge_memory_rating'] = new_memory_rating
                 trial['challenge_memory_rt'] = new_memory_rt
-                trial['feedback_message'] = "Challenged: This word was not presented. Please rethink and give the ratings."
+                trial['feedback_message'] = FEEDBACK_CHALLENGED
                 win.flip()
             else:
-                instr_text = (
-                    "Congratulations, your answer was correct\n"
-                    "You correctly recognized the word\n\n\n"
-                    "Press SPACE to continue"
-                )
-                instr_stim = visual.TextStim(
-                    win=win,
-                    text=instr_text,
-                    font='Arial',
-                    height=36,
-                    color='green',
-                    wrapWidth=1500,
-                    pos=(0, -100)
-                )
-                instr_stim.draw()
-                trial['feedback_message'] = "You correctly recognized the word."
+                stims['recognized'].draw()
+                trial['feedback_message'] = FEEDBACK_RECOGNIZED
                 win.flip()
                 event.waitKeys(keyList=['space', 'escape'])
         elif trial['recognition_response'] == 'n':
-            instr_text = (
-                "Congratulations, your answer was correct\n"
-                "You correctly rejected the word\n\n"
-                "Press SPACE to continue"
-            )
-            instr_stim = visual.TextStim(
-                win=win,
-                text=instr_text,
-                font='Arial',
-                height=36,
-                color='green',
-                wrapWidth=1500,
-                pos=(0, -100)
-            )
-            instr_stim.draw()
-            trial['feedback_message'] = "You correctly rejected the word."
+            stims['rejected'].draw()
+            trial['feedback_message'] = FEEDBACK_REJECTED
             win.flip()
             event.waitKeys(keyList=['space', 'escape'])
+        leak_tracker.snapshot(trial_no)
         core.wait(0.3)
+    leak_tracker.report("leaks_challenge.csv")
 
 # CSV output
 
-def save_results(trial_list, output_filename):
-    sorted_trials = sorted(trial_list, key=lambda x: x['presentation_order'])
-    fieldnames = [
-        'presentation_order', 'excel_order', 'word', 'Type', 'old_new', 'y_n',
-        'recognition_response', 'recognition_rt',
-        'belief_rating', 'belief_rt', 'memory_rating', 'memory_rt',
-        'challenge_belief_rating', 'challenge_belief_rt',
-        'challenge_memory_rating', 'challenge_memory_rt',
-        'feedback_message'
-    ]
-    with open(output_filename, 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for trial in sorted_trials:
-            writer.writerow(trial)
+def save_results(trial_table, output_filename):
+    write_results(trial_table, output_filename)
     print(f"Results saved to {output_filename}")
 
 
@@ -481,6 +499,15 @@ def main():
     if not dlg.OK:
         core.quit()
 
+    # per-participant test list from stimulus_store.py, if one was drawn
+    excel_file = participant_sheet('variables', expInfo['Participant'])
+    print(f"Test list for participant {expInfo['Participant']}: {excel_file}")
+
+    # load the next phase's data in the background while screens are up
+    prefetcher = Prefetcher()
+    if os.path.exists(excel_file):
+        prefetcher.start('trials', load_trial_table, excel_file)
+
     myMon = monitors.Monitor('myMonitor')
     myMon.setSizePix((1920, 1080))
     myMon.setWidth(53)
@@ -514,8 +541,7 @@ def main():
 
     rt_clock = core.Clock()
 
-    excel_file = "variables_96.xlsx"
-    trial_list = run_recognition_phase(win, slider, rt_clock, excel_file)
+    trial_table = run_recognition_phase(win, slider, rt_clock, excel_file, prefetcher)
 
     proceed_text = visual.TextStim(
         win=win,
@@ -527,6 +553,9 @@ def main():
     )
     proceed_text.draw()
     win.flip()
+    # feedback screens are built now, the challenge plan during the filler
+    feedback_stims = make_feedback_stims(win)
+    prefetcher.start('challenge_plan', challenge_plan, trial_table)
     key = event.waitKeys(keyList=['space', 'escape'])
     if key and key[0]=='escape':
         win.close()
@@ -536,10 +565,15 @@ def main():
     run_filler_task(win, duration=95)
 
     # Run challenge phase 
-    run_challenge_phase(win, slider, rt_clock, trial_list)
+    run_challenge_phase(win, slider, rt_clock, trial_table,
+                        prefetcher.get('challenge_plan'), feedback_stims)
+    prefetcher.shutdown()
 
     output_filename = f"results_{expInfo['Participant']}.csv"
-    save_results(trial_list, output_filename)
+    save_results(trial_table, output_filename)
+    # send the records to the lab collector in the background
+    push_thread = push_results(to_records(trial_table), expInfo['Participant'], session=2,
+                               host=COLLECTOR_HOST, port=COLLECTOR_PORT)
 
     end_text = visual.TextStim(
         win=win,
@@ -551,6 +585,7 @@ def main():
     end_text.draw()
     win.flip()
     event.waitKeys()
+    push_thread.join(timeout=5)
     win.close()
     core.quit()
 
@@ -0,0 +1,183 @@
+"""
+Synthetic participants for power analysis.
+
+Simulated participants go through the same trial logic as sess 2
+(trials.make_trial_table's shuffling, the every-third-'y' challenge rule
+in trials.challenge_plan and the save_results rows), with responses
+drawn from per-Type parameters shifted by each participant's random
+effects, so cohorts vary between participants as well as between
+trials. Whole cohorts are simulated in worker processes and analysed
+with resampling.valence_contrasts; the power of each contrast is the
+share of cohorts with p < alpha.
+
+    python simulate.py --cohorts 1000 --participants 40 --processes 8
+"""
+import argparse, json, os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from trials import (sheet_table, shuffle_trials, challenge_plan, result_table, results_frame,
+                    FEEDBACK_CHALLENGED, FEEDBACK_RECOGNIZED, FEEDBACK_REJECTED)
+from resampling import valence_contrasts
+
+SHEET_FILE = "variables_96.xlsx"
+OUTPUT_FILE = "power.csv"
+
+# Response model for one valence Type. RTs are ex-Gaussian (s);
+# ratings are rounded normals clipped to 1..8; the challenge shifts
+# the belief and memory ratings by *_change on average. Each participant
+# draws one random effect per RANDOM_EFFECTS entry, scaled by the
+# between-participant SD <name>_sd (hit and false-alarm rates on the
+# logit scale).
+BASE_PARAMS = {
+    'hit_rate': 0.80, 'fa_rate': 0.20,
+    'memory_mean': 5.5, 'belief_mean': 6.0, 'rating_sd': 1.5,
+    'belief_change': -2.0, 'memory_change': -1.0, 'change_sd': 1.5,
+    'rt_mu': 0.60, 'rt_sigma': 0.10, 'rt_tau': 0.30,
+    'rating_rt_mu': 1.50, 'rating_rt_sigma': 0.30, 'rating_rt_tau': 0.80,
+    'hit_rate_sd': 0.5, 'fa_rate_sd': 0.5,
+    'memory_mean_sd': 0.8, 'belief_mean_sd': 0.8,
+    'belief_change_sd': 1.0, 'memory_change_sd': 0.8,
+}
+RANDOM_EFFECTS = ['hit_rate', 'fa_rate', 'memory_mean', 'belief_mean',
+                  'belief_change', 'memory_change']
+# Per-Type overrides; here 'm' words are assumed to lose more belief when challenged
+DEFAULT_PARAMS = {
+    'm': {'belief_change': -2.5},
+    'n': {},
+    'p': {},
+}
+
+
+def type_params(params, word_type):
+    merged = dict(BASE_PARAMS)
+    merged.update(params.get(word_type, {}))
+    return merged
+
+
+def participant_params(params, word_type, effects):
+    """Type parameters shifted by one participant's random effects (standard normal draws)."""
+    p = type_params(params, word_type)
+    for name in RANDOM_EFFECTS:
+        shift = effects[name] * p[f'{name}_sd']
+        if name in ('hit_rate', 'fa_rate'):
+            p[name] = 1.0 / (1.0 + np.exp(-(np.log(p[name] / (1.0 - p[name])) + shift)))
+        else:
+            p[name] += shift
+    return p
+
+
+def _exgauss(rng, size, mu, sigma, tau):
+    return rng.normal(mu, sigma, size) + rng.exponential(tau, size)
+
+
+def _ratings(rng, mean, sd, size):
+    return np.clip(np.rint(rng.normal(mean, sd, size)), 1, 8).astype(np.int8)
+
+
+def simulate_participant(template, params, rng):
+    """
+    One synthetic sess 2 run: returns the filled trial table, as
+    run_recognition_phase and run_challenge_phase would leave it.
+    """
+    table = shuffle_trials(template, rng)
+    n = len(table)
+    effects = dict(zip(RANDOM_EFFECTS, rng.standard_normal(len(RANDOM_EFFECTS))))
+
+    # recognition
+    said_yes = np.zeros(n, dtype=bool)
+    for word_type in np.unique(table['Type']):
+        p = participant_params(params, word_type, effects)
+        rows = np.flatnonzero(table['Type'] == word_type)
+        p_yes = np.where(table['y_n'][rows] == 'y', p['hit_rate'], p['fa_rate'])
+        yes_rows = rows[rng.random(len(rows)) < p_yes]
+        said_yes[yes_rows] = True
+        table['recognition_rt'][rows] = _exgauss(rng, len(rows), p['rt_mu'], p['rt_sigma'], p['rt_tau'])
+        k = len(yes_rows)
+        table['memory_rating'][yes_rows] = _ratings(rng, p['memory_mean'], p['rating_sd'], k)
+        table['belief_rating'][yes_rows] = _ratings(rng, p['belief_mean'], p['rating_sd'], k)
+        for name in ('memory_rt', 'belief_rt'):
+            table[name][yes_rows] = _exgauss(rng, k, p['rating_rt_mu'], p['rating_rt_sigma'],
+                                             p['rating_rt_tau'])
+    table['recognition_response'] = np.where(said_yes, 'y', 'n')
+
+    # challenge phase
+    idx, challenged = challenge_plan(table)
+    response = table['recognition_response'][idx]
+    table['feedback_message'][idx] = np.where(
+        challenged, FEEDBACK_CHALLENGED,
+        np.where(response == 'y', FEEDBACK_RECOGNIZED, FEEDBACK_REJECTED))
+    challenged_rows = idx[challenged]
+    for word_type in np.unique(table['Type'][challenged_rows]):
+        p = participant_params(params, word_type, effects)
+        rows = challenged_rows[table['Type'][challenged_rows] == word_type]
+        k = len(rows)
+        for rating, change in (('belief', 'belief_change'), ('memory', 'memory_change')):
+            before = table[f'{rating}_rating'][rows]
+            after = np.rint(before + rng.normal(p[change], p['change_sd'], k))
+            table[f'challenge_{rating}_rating'][rows] = np.clip(after, 1, 8)
+            table[f'challenge_{rating}_rt'][rows] = _exgauss(
+                rng, k, p['rating_rt_mu'], p['rating_rt_sigma'], p['rating_rt_tau'])
+    return table
+
+
+def simulate_cohort(template, params, n_participants, rng):
+    """Combined results table of n_participants synthetic participants."""
+    rows = [result_table(simulate_participant(template, params, rng))
+            for _ in range(n_participants)]
+    df = results_frame(np.concatenate(rows))
+    df.insert(0, 'participant', np.repeat([f"sim{i + 1}" for i in range(n_participants)],
+                                          [len(r) for r in rows]))
+    return df
+
+
+def _cohort_pvalues(template, params, n_participants, n_resamples, seed):
+    rng = np.random.default_rng(seed)
+    df = simulate_cohort(template, params, n_participants, rng)
+    contrasts = valence_contrasts(df, n_resamples, processes=1, seed=int(rng.integers(2 ** 32)))
+    return contrasts[['measure', 'contrast', 'p_value']]
+
+
+def estimate_power(template, params=DEFAULT_PARAMS, n_cohorts=1000, n_participants=40,
+                   n_resamples=2000, alpha=0.05, processes=None, seed=None):
+    """Share of simulated cohorts with p < alpha, per measure and contrast."""
+    seeds = np.random.SeedSequence(seed).spawn(n_cohorts)
+    chunksize = max(1, n_cohorts // (4 * (processes or os.cpu_count() or 1)))
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = list(pool.map(_cohort_pvalues, [template] * n_cohorts, [params] * n_cohorts,
+                                [n_participants] * n_cohorts, [n_resamples] * n_cohorts,
+                                seeds, chunksize=chunksize))
+    p_values = pd.concat(results, ignore_index=True)
+    power = (p_values.assign(significant=p_values['p_value'] < alpha)
+             .groupby(['measure', 'contrast'], sort=False)['significant'].mean()
+             .rename('power').reset_index())
+    power.insert(2, 'n_participants', n_participants)
+    return power
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NBM power simulation")
+    parser.add_argument('--sheet', default=SHEET_FILE)
+    parser.add_argument('--params', help="JSON file with per-Type parameter overrides")
+    parser.add_argument('--cohorts', type=int, default=1000)
+    parser.add_argument('--participants', type=int, nargs='+', default=[40])
+    parser.add_argument('--resamples', type=int, default=2000)
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--out', default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    params = DEFAULT_PARAMS
+    if args.params:
+        with open(args.params) as f:
+            params = json.load(f)
+    template = sheet_table(pd.read_excel(args.sheet))
+
+    tables = [estimate_power(template, params, args.cohorts, n, args.resamples, args.alpha,
+                             args.processes, args.seed)
+              for n in args.participants]
+    power = pd.concat(tables, ignore_index=True)
+    print(power.to_string(index=False))
+    power.to_csv(args.out, index=False)
+    print(f"Power estimates saved to {args.out}")
@@ -0,0 +1,192 @@
+"""
+Indexed stimulus store for large normed word pools.
+
+The pool is imported once into SQLite (one row per word, indexed on
+Type, valence and length). A participant's lists are then drawn from
+the indexes without loading the pool into memory:
+
+    python stimulus_store.py build pool.csv
+    python stimulus_store.py sample P01
+
+`sample` writes stim_P01.xlsx (study list, as stim_96.xlsx) and
+variables_P01.xlsx (test list, as variables_96.xlsx). Both sessions pick
+a participant's sheets with participant_sheet, so sess 1 and sess 2 always
+load matching lists.
+"""
+import argparse, os, random, sqlite3, zlib
+import pandas as pd
+
+DB_FILE = 'stimuli.sqlite'
+CHUNK_SIZE = 5000
+SHEET_KINDS = ('stim', 'variables')  # study list (sess 1), test list (sess 2)
+
+
+# ---------------------------------------------------------
+# Building the store
+# ---------------------------------------------------------
+def open_store(db_file=DB_FILE):
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS words ("
+        " id INTEGER PRIMARY KEY, word TEXT NOT NULL UNIQUE, type TEXT NOT NULL,"
+        " valence REAL, length INTEGER NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS words_type_valence ON words (type, valence, length)")
+    conn.execute("CREATE INDEX IF NOT EXISTS words_type_length ON words (type, length)")
+    return conn
+
+
+def _read_chunks(source):
+    if source.lower().endswith(('.xlsx', '.xls')):
+        yield pd.read_excel(source)
+    else:
+        yield from pd.read_csv(source, chunksize=CHUNK_SIZE)
+
+
+def build_store(source, db_file=DB_FILE):
+    """
+    Import a word pool (csv or Excel; columns: words, Type and optionally
+    valence) into the store. Words already in the store are updated.
+    """
+    if not os.path.exists(source):
+        print(f"Error: File {source} not found!")
+        return 0
+    conn = open_store(db_file)
+    n = 0
+    with conn:
+        for chunk in _read_chunks(source):
+            if 'words' not in chunk.columns or 'Type' not in chunk.columns:
+                print("Error: The word pool must have 'words' and 'Type' columns!")
+                return 0
+            chunk = chunk.dropna(subset=['words', 'Type'])
+            words = chunk['words'].astype(str).str.strip()
+            if 'valence' in chunk.columns:
+                valence = [None if pd.isna(v) else float(v) for v in chunk['valence']]
+            else:
+                valence = [None] * len(chunk)
+            rows = zip(words.tolist(), chunk['Type'].astype(str).str.strip().tolist(),
+                       valence, words.str.len().tolist())
+            conn.executemany(
+                "INSERT INTO words (word, type, valence, length) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(word) DO UPDATE SET type = excluded.type,"
+                " valence = excluded.valence, length = excluded.length",
+                rows
+            )
+            n += len(chunk)
+    conn.execute("ANALYZE")
+    conn.close()
+    print(f"Imported {n} words into {db_file}")
+    return n
+
+
+# ---------------------------------------------------------
+# Sampling
+# ---------------------------------------------------------
+def participant_seed(participant):
+    """Stable seed, so a participant always gets the same lists."""
+    return zlib.crc32(str(participant).encode())
+
+
+def sample_lists(participant, n_old=16, n_new=16, n_study_only=16, types=None,
+                 valence_range=None, length_range=None, db_file=DB_FILE, seed=None):
+    """
+    Draw a participant's study and test lists, stratified by Type.
+    For every Type, n_old words are studied and tested ('old', 'y'),
+    n_new are only tested ('new', 'n') and n_study_only are only studied.
+    Returns (study_df, test_df) with the columns of stim_96.xlsx and
+    variables_96.xlsx.
+    """
+    conn = sqlite3.connect(db_file)
+    rng = random.Random(participant_seed(participant) if seed is None else seed)
+    if types is None:
+        types = [t for (t,) in conn.execute("SELECT DISTINCT type FROM words ORDER BY type")]
+
+    where, params = "", []
+    if valence_range is not None:
+        where += " AND valence BETWEEN ? AND ?"
+        params += list(valence_range)
+    if length_range is not None:
+        where += " AND length BETWEEN ? AND ?"
+        params += list(length_range)
+
+    n_per_type = n_old + n_new + n_study_only
+    roles = {}
+    for word_type in types:
+        # ids only: answered from the (type, valence, length) index
+        ids = [i for (i,) in conn.execute(
+            "SELECT id FROM words WHERE type = ?" + where, [word_type] + params)]
+        if len(ids) < n_per_type:
+            conn.close()
+            raise ValueError(f"Only {len(ids)} words of Type {word_type!r} match, "
+                             f"{n_per_type} needed")
+        chosen = rng.sample(ids, n_per_type)
+        roles.update((i, 'old') for i in chosen[:n_old])
+        roles.update((i, 'new') for i in chosen[n_old:n_old + n_new])
+        roles.update((i, 'study') for i in chosen[n_old + n_new:])
+
+    rows = {}
+    ids = list(roles)
+    for start in range(0, len(ids), 900):  # stay under SQLite's variable limit
+        batch = ids[start:start + 900]
+        rows.update((i, (word, word_type)) for i, word, word_type in conn.execute(
+            f"SELECT id, word, type FROM words WHERE id IN ({', '.join('?' * len(batch))})", batch))
+    conn.close()
+
+    study = [rows[i][0] for i in ids if roles[i] in ('old', 'study')]
+    rng.shuffle(study)
+    test = [(rows[i][0], rows[i][1], roles[i], 'y' if roles[i] == 'old' else 'n')
+            for i in ids if roles[i] in ('old', 'new')]
+    study_df = pd.DataFrame({'words': study})
+    test_df = pd.DataFrame(test, columns=['words', 'Type', 'old_new', 'y_n'])
+    return study_df, test_df
+
+
+def write_lists(participant, out_dir='.', **kwargs):
+    """Write stim_<participant>.xlsx and variables_<participant>.xlsx."""
+    study_df, test_df = sample_lists(participant, **kwargs)
+    study_file = os.path.join(out_dir, f"stim_{participant}.xlsx")
+    test_file = os.path.join(out_dir, f"variables_{participant}.xlsx")
+    study_df.to_excel(study_file, index=False)
+    test_df.to_excel(test_file, index=False)
+    print(f"Lists saved to {study_file} and {test_file}")
+    return study_file, test_file
+
+
+def participant_sheet(kind, participant, sheet_dir=''):
+    """
+    The sheet a session loads for participant: <kind>_<participant>.xlsx if
+    one was sampled, else the shared <kind>_96.xlsx. Warns when only one of
+    the participant's two lists exists, since the sessions would then use
+    lists that do not belong together.
+    """
+    own = {k: os.path.join(sheet_dir, f"{k}_{participant}.xlsx") for k in SHEET_KINDS}
+    found = [k for k in SHEET_KINDS if os.path.exists(own[k])]
+    missing = [k for k in SHEET_KINDS if k not in found]
+    if len(found) == 1:
+        print(f"WARNING: {own[found[0]]} exists but not {own[missing[0]]}; "
+              f"study and test lists will not match")
+    if kind in found:
+        return own[kind]
+    return os.path.join(sheet_dir, f"{kind}_96.xlsx")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NBM stimulus store")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build')
+    build.add_argument('source')
+    sample = sub.add_parser('sample')
+    sample.add_argument('participant')
+    sample.add_argument('--old', type=int, default=16)
+    sample.add_argument('--new', type=int, default=16)
+    sample.add_argument('--study-only', type=int, default=16)
+    sample.add_argument('--out', default='.')
+    for subparser in (build, sample):
+        subparser.add_argument('--db', default=DB_FILE)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_store(args.source, args.db)
+    else:
+        write_lists(args.participant, args.out, n_old=args.old, n_new=args.new,
+                    n_study_only=args.study_only, db_file=args.db)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from resampling import resample_test, valence_contrasts
+
+
+def synthetic_results(n_participants=8, trials_per_type=4, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_participants):
+        for word_type, shift in (('m', -2.0), ('n', -1.0), ('p', -1.0)):
+            belief = rng.integers(4, 9, trials_per_type)
+            memory = rng.integers(4, 9, trials_per_type)
+            for k in range(trials_per_type):
+                challenged = k % 2 == 0
+                rows.append({
+                    'participant': f"P{i + 1}", 'Type': word_type,
+                    'belief_rating': belief[k], 'memory_rating': memory[k],
+                    'challenge_belief_rating': belief[k] + shift if challenged else np.nan,
+                    'challenge_memory_rating': memory[k] - 1 if challenged else np.nan,
+                })
+    return pd.DataFrame(rows)
+
+
+def test_valence_contrasts_smoke():
+    table = valence_contrasts(synthetic_results(), n_resamples=200, seed=1)
+    assert len(table) == 2 * 6  # two measures x (three Types + three pairs)
+    assert (table['n_participants'] == 8).all()
+    assert table['p_value'].between(0, 1).all()
+    assert (table['ci_low'] <= table['ci_high']).all()
+    m_minus_n = table[(table['measure'] == 'belief_change') & (table['contrast'] == 'm - n')]
+    assert np.isclose(m_minus_n['estimate'].iloc[0], -1.0)
+
+
+def test_valence_contrasts_default_seed():
+    assert not valence_contrasts(synthetic_results(), n_resamples=50).empty
+
+
+def test_resample_test_accepts_seed_sequence():
+    seed = np.random.SeedSequence(3)
+    first = resample_test([1.0, 2.0, -0.5, 1.5], n_resamples=100, seed=seed)
+    second = resample_test([1.0, 2.0, -0.5, 1.5], n_resamples=100, seed=np.random.SeedSequence(3))
+    assert first == second
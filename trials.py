@@ -0,0 +1,166 @@
+"""
+Column-oriented trial table for sess 2.
+
+All trials of a participant live in one NumPy structured array (one row
+per word, one typed column per field). The table is built vectorized
+from the stimulus sheet and filled in place while the participant
+responds. Missing values are 0 for ratings, NaN for RTs and '' for the
+response, and are written as empty cells by save_results.
+"""
+import csv
+import numpy as np
+import pandas as pd
+
+FIELDNAMES = [
+    'presentation_order', 'excel_order', 'word', 'Type', 'old_new', 'y_n',
+    'recognition_response', 'recognition_rt',
+    'belief_rating', 'belief_rt', 'memory_rating', 'memory_rt',
+    'challenge_belief_rating', 'challenge_belief_rt',
+    'challenge_memory_rating', 'challenge_memory_rt',
+    'feedback_message'
+]
+
+RATING_FIELDS = ['belief_rating', 'memory_rating',
+                 'challenge_belief_rating', 'challenge_memory_rating']
+RT_FIELDS = ['recognition_rt', 'belief_rt', 'memory_rt',
+             'challenge_belief_rt', 'challenge_memory_rt']
+
+# feedback_message is stored as a code into this tuple
+FEEDBACK_NONE = 0
+FEEDBACK_CHALLENGED = 1
+FEEDBACK_RECOGNIZED = 2
+FEEDBACK_REJECTED = 3
+FEEDBACK_MESSAGES = (
+    "",
+    "Challenged: This word was not presented. Please rethink and give the ratings.",
+    "You correctly recognized the word.",
+    "You correctly rejected the word.",
+)
+
+
+def trial_dtype(word_len=32, type_len=8, old_new_len=8, y_n_len=1):
+    return np.dtype(
+        [('presentation_order', 'i4'), ('excel_order', 'i4'),
+         ('word', f'U{word_len}'), ('Type', f'U{type_len}'),
+         ('old_new', f'U{old_new_len}'), ('y_n', f'U{y_n_len}'),
+         ('recognition_response', 'U1')]
+        + [(name, 'f8') for name in RT_FIELDS]
+        + [(name, 'i1') for name in RATING_FIELDS]
+        + [('feedback_message', 'i1')]
+    )
+
+
+def sheet_table(df):
+    """
+    Unshuffled trial table for the stimulus sheet
+    (columns: words, Type, old_new, y_n), one row per sheet row.
+    """
+    words = df['words'].astype(str).to_numpy().astype(str)
+    types = df['Type'].astype(str).to_numpy().astype(str)
+    old_new = df['old_new'].astype(str).to_numpy().astype(str)
+    y_n = np.char.lower(np.char.strip(df['y_n'].astype(str).to_numpy().astype(str)))
+    widths = [max(1, column.itemsize // 4) for column in (words, types, old_new, y_n)]
+
+    table = np.zeros(len(df), dtype=trial_dtype(*widths))
+    table['presentation_order'] = np.arange(1, len(df) + 1)
+    table['excel_order'] = np.arange(len(df))
+    table['word'] = words
+    table['Type'] = types
+    table['old_new'] = old_new
+    table['y_n'] = y_n
+    for name in RT_FIELDS:
+        table[name] = np.nan
+    return table
+
+
+def shuffle_trials(table, rng=None):
+    """
+    A copy of table in random presentation order.
+    Row i is presentation i + 1; excel_order still points to the sheet row.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    shuffled = table[rng.permutation(len(table))]
+    shuffled['presentation_order'] = np.arange(1, len(table) + 1)
+    return shuffled
+
+
+def make_trial_table(df, rng=None):
+    """Shuffled trial table for the stimulus sheet."""
+    return shuffle_trials(sheet_table(df), rng)
+
+
+def load_trial_table(excel_file, rng=None):
+    """Read the stimulus sheet and build its trial table (safe on a worker thread)."""
+    return make_trial_table(pd.read_excel(excel_file), rng)
+
+
+def answered(table):
+    """Rows the participant responded to in the recognition phase."""
+    return table['recognition_response'] != ''
+
+
+def challenge_plan(table):
+    """
+    Trials shown in the challenge phase, in presentation order, and which
+    of them are challenged.
+    Misses ('n' to a word whose y_n is 'y') are skipped; every third 'y'
+    response is challenged.
+    """
+    response = table['recognition_response']
+    keep = answered(table) & ~((response == 'n') & (table['y_n'] == 'y'))
+    idx = np.flatnonzero(keep)
+    idx = idx[np.argsort(table['presentation_order'][idx], kind='stable')]
+    said_yes = response[idx] == 'y'
+    challenged = np.zeros(len(idx), dtype=bool)
+    challenged[said_yes] = np.arange(1, said_yes.sum() + 1) % 3 == 0
+    return idx, challenged
+
+
+def result_table(table):
+    """Answered trials in presentation order: the rows save_results writes."""
+    rows = table[answered(table)]
+    return rows[np.argsort(rows['presentation_order'], kind='stable')]
+
+
+def result_rows(table):
+    """Answered trials in presentation order, formatted as CSV rows."""
+    rows = result_table(table)
+    columns = {}
+    for name in FIELDNAMES:
+        if name == 'feedback_message':
+            columns[name] = [FEEDBACK_MESSAGES[code] for code in rows[name]]
+        elif name in RATING_FIELDS:
+            columns[name] = [int(v) if v else '' for v in rows[name]]
+        elif name in RT_FIELDS:
+            columns[name] = ['' if np.isnan(v) else float(v) for v in rows[name]]
+        else:
+            columns[name] = rows[name].tolist()
+    return zip(*(columns[name] for name in FIELDNAMES))
+
+
+def results_frame(rows):
+    """
+    A result table (see result_table) as the DataFrame that reading the
+    save_results CSV gives: blank ratings and RTs are NaN.
+    """
+    columns = {}
+    for name in FIELDNAMES:
+        if name == 'feedback_message':
+            columns[name] = np.asarray(FEEDBACK_MESSAGES, dtype=object)[rows[name]]
+        elif name in RATING_FIELDS:
+            columns[name] = np.where(rows[name] > 0, rows[name], np.nan)
+        else:
+            columns[name] = rows[name]
+    return pd.DataFrame(columns)
+
+
+def write_results(table, output_filename):
+    with open(output_filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(FIELDNAMES)
+        writer.writerows(result_rows(table))
+
+
+def to_records(table):
+    """Answered trials as a list of dicts (field name -> CSV value)."""
+    return [dict(zip(FIELDNAMES, row)) for row in result_rows(table)]